@@ -0,0 +1,164 @@
+import argparse, csv, json, os, sys
+from dataclasses import asdict
+import numpy as np
+
+from simulation_engine import (
+    ModelConfig, ServiceDistribution, RunLength, validate_inputs, validate_run_length,
+    traffic_intensity, generate_simulation, steady_state, new_seed, Profiler, profile_stage
+)
+from trace_io import TRACE_FORMATS, TraceWriter
+
+# Command-line batch runs of the simulation engine.
+#
+#   python batch_runner.py params/*.json --out results/
+#
+# A parameter file holds one run or a list of runs, e.g.
+#   {"name": "mms_base", "model": "MMS", "lmbd": 2.0, "s": 3, "runs": 5,
+#    "service": {"kind": "exponential", "mu": 3.0}, "run_length": {"customers": 100000}}
+# "seed": S makes a run reproducible (run r uses child r of SeedSequence(S)); without it a fresh
+# seed is drawn and written to the summary so the run can be replayed.
+# Priority runs take "with_priority", "preemption" and "priority_classes" (default 3).
+# Add "keep_rows": K to accumulate statistics while streaming and only keep the first K rows.
+# --steady-state adds MSER-5 warm-up / batch-means estimates (SS ...) for runs that keep every row.
+# --trace csv|parquet|memmap streams each run's full trace to <out>/<name>_run<r>_trace/ (see trace_io).
+# --profile [time|memory] writes per-stage timings (and tracemalloc peaks) of every run to <out>/profile.csv.
+
+SUMMARY_FIELDS = ["name", "source", "seed", "run", "model", "lmbd", "s", "service", "rho",
+                  "Customers", "Avg Waiting", "Std Waiting", "Avg Turnaround", "Std Turnaround",
+                  "Avg Response", "Std Response", "Avg Queue Length", "Avg In System", "Utilization",
+                  "Makespan", "Warm-up Customers", "SS Wq", "SS Wq HW", "SS W", "SS W HW",
+                  "SS Utilization", "SS Utilization HW", "error"]
+PROFILE_FIELDS = ["name", "run", "stage", "calls", "seconds", "self_seconds", "count", "per_second", "peak_mb"]
+
+def load_runs(path):
+    with open(path) as f:
+        data = json.load(f)
+    runs = data if isinstance(data, list) else [data]
+    base = os.path.splitext(os.path.basename(path))[0]
+    for i, run in enumerate(runs):
+        if not isinstance(run, dict): raise ValueError(f"run {i + 1} is not a JSON object")
+        run.setdefault("name", base if len(runs) == 1 else f"{base}_{i + 1}")
+    return runs
+
+def build_configs(run):
+    model = ModelConfig(
+        model=run.get("model", "MM1"),
+        lmbd=run.get("lmbd"),
+        s=int(run.get("s", 1)),
+        with_priority=bool(run.get("with_priority", False)),
+        preemption=bool(run.get("preemption", False)),
+        priority_classes=int(run.get("priority_classes", 3))
+    )
+    service = ServiceDistribution(**run.get("service", {}))
+    run_length = RunLength(**run.get("run_length", {}))
+    return model, service, run_length
+
+def steady_state_fields(df, gantt, s):
+    ss = steady_state(df, gantt, s)
+    if "error" in ss:
+        return {"error": ss["error"]}
+    fields = {"Warm-up Customers": ss["Warm-up Customers"]}
+    for name, ci in ss["intervals"].items():
+        fields[f"SS {name}"], fields[f"SS {name} HW"] = ci["mean"], ci["half_width"]
+    return fields
+
+def execute(run, source, out_dir, write_customers=True, trace_fmt=None, with_steady_state=False, profile=None):
+    # profile: None, "time" or "memory"; each result row then carries its stage records under "profile".
+    # A bad parameter or a failing replication becomes an error row; the rest of the batch still runs.
+    try:
+        model, service, run_length = build_configs(run)
+        runs, seed = int(run.get("runs", 1)), run.get("seed")
+        seed = new_seed() if seed is None else int(seed)
+    except (TypeError, ValueError) as e:
+        return [{"name": run["name"], "source": source, "run": 1, "error": f"Invalid parameters: {e}"}]
+    row = {"name": run["name"], "source": source, "model": model.model, "lmbd": model.lmbd,
+           "s": model.s, "service": service.kind}
+
+    errors = validate_inputs(model, service) + validate_run_length(run_length)
+    if errors:
+        return [dict(row, run=1, error=" ".join(errors))]
+
+    rho = traffic_intensity(model, service)
+    if rho > 1:
+        return [dict(row, run=1, rho=rho, error=f"Simulation does not execute as ρ = {rho:.3f} > 1")]
+
+    row["seed"] = seed
+    children = np.random.SeedSequence(seed).spawn(runs)
+    rows = []
+    for r in range(1, runs + 1):
+        trace = None
+        profiler = Profiler(memory=profile == "memory") if profile else None
+        try:
+            if trace_fmt:
+                trace = TraceWriter(os.path.join(out_dir, f"{run['name']}_run{r}_trace"), trace_fmt,
+                                    meta={"name": run["name"], "run": r, "seed": seed, "model": asdict(model),
+                                          "service": asdict(service)})
+            df, summary, gantt = generate_simulation(model, service, rng=children[r - 1], run_length=run_length,
+                                                     keep_rows=run.get("keep_rows"), trace=trace, profiler=profiler)
+            if trace is not None:
+                trace.close(summary)
+            if write_customers:
+                with profile_stage(profiler, "write_csv", len(df)):
+                    df.to_csv(os.path.join(out_dir, f"{run['name']}_run{r}.csv"), index=False)
+            if with_steady_state and run.get("keep_rows") is None:
+                with profile_stage(profiler, "steady_state", len(df)):
+                    summary.update(steady_state_fields(df, gantt, model.s))
+            rows.append(dict(row, run=r, rho=rho, **summary))
+        except Exception as e:
+            rows.append(dict(row, run=r, rho=rho, error=f"{type(e).__name__}: {e}"))
+        finally:
+            if trace is not None and not trace.closed:
+                trace.abort()
+            if profiler is not None:
+                profiler.close()
+        if profiler is not None:
+            rows[-1]["profile"] = profiler.records()
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run simulation parameter files without the Streamlit UI.")
+    parser.add_argument("params", nargs="+", help="JSON parameter files (one run or a list of runs each)")
+    parser.add_argument("--out", default="results", help="output directory (default: results)")
+    parser.add_argument("--summary-only", action="store_true", help="skip the per-customer CSV files")
+    parser.add_argument("--steady-state", action="store_true", help="add warm-up / batch-means estimates")
+    parser.add_argument("--trace", choices=list(TRACE_FORMATS), help="stream each run's full trace in this format")
+    parser.add_argument("--profile", nargs="?", const="time", choices=["time", "memory"],
+                        help="write per-stage timings (memory: also tracemalloc peaks, much slower) to profile.csv")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    summary_path = os.path.join(args.out, "summary.csv")
+    profile_rows = []
+    failed = 0
+
+    with open(summary_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for path in args.params:
+            try:
+                runs = load_runs(path)
+            except (OSError, ValueError) as e:
+                failed += 1
+                writer.writerow({"name": os.path.splitext(os.path.basename(path))[0], "source": path, "run": 1,
+                                 "error": f"Cannot read parameter file: {e}"})
+                continue
+            for run in runs:
+                for row in execute(run, path, args.out, write_customers=not args.summary_only, trace_fmt=args.trace,
+                                   with_steady_state=args.steady_state, profile=args.profile):
+                    failed += bool(row.get("error"))
+                    writer.writerow(row)
+                    profile_rows += [dict(record, name=row["name"], run=row["run"])
+                                     for record in row.get("profile", [])]
+
+    print(f"Wrote {summary_path}" + (f" ({failed} failed runs)" if failed else ""))
+    if args.profile:
+        profile_path = os.path.join(args.out, "profile.csv")
+        with open(profile_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=PROFILE_FIELDS)
+            writer.writeheader()
+            writer.writerows(profile_rows)
+        print(f"Wrote {profile_path}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+import os
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import argparse, importlib.util, io, json, platform, subprocess, sys, time, tracemalloc
+import numpy as np
+import matplotlib.pyplot as plt
+
+from simulation_engine import (
+    ModelConfig, ServiceDistribution, RunLength, generate_simulation, queue_series, get_time_series_data,
+    server_utilization, steady_state
+)
+from sim_charts import gantt_segments, gantt_figure, queue_figure, occupancy_figure
+from queuing_models import erlang_b, compute_mm1, compute_mms, compute_mgs, compute_ggs, compute_model_array
+from staffing_optimizer import min_servers
+
+# Benchmarks for the engine, chart and calculator hot paths, and the cold start of the app pages
+# (those cases only run when streamlit is installed).
+#
+#   python benchmark_suite.py --profile quick --out bench.json
+#   python benchmark_suite.py --profile quick --baseline bench_main.json
+#
+# Every case records the best wall time of each stage over --repeat runs, throughput (simulated
+# events / s for the engine, calls / s for the calculator) and the peak traced memory of one more
+# run under tracemalloc. With --baseline, cases slower than the baseline by more than --tolerance,
+# or using more memory by more than --mem-tolerance, are flagged and the exit code is 1.
+# Timings only compare on the same machine; save a baseline there before changing the engine.
+# The landing page also has an absolute budget: its first run in a fresh interpreter must take at
+# most STARTUP_BUDGET seconds and load none of HEAVY_MODULES, otherwise the exit code is 1.
+
+LMBD = 2.0           # mean inter-arrival ~ λ time units in the simulator
+LOAD = 0.8           # mean service time LOAD * λ * s keeps ρ ≈ 0.8 for any s
+KEEP_ALL_LIMIT = 10**5   # larger runs use streaming mode (keep_rows=0) and skip the chart stages
+MIN_CASE_TIME = 0.2      # fast cases repeat until they have run this long (best run is kept)
+MIN_CALL_TIME = 0.02     # calculator calls are looped for at least this long per timed run
+STARTUP_BUDGET = 0.5     # seconds for the landing page's first run (the streamlit import excluded)
+HEAVY_MODULES = ["numpy", "pandas", "matplotlib", "pyarrow"]
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+PROFILES = {
+    "quick": {
+        "customers": [10**2, 10**3, 10**4, 10**5],
+        "servers": [1, 10, 100, 1000],
+        "server_customers": 10**4,
+        "charts": [10**4],
+        "calc_servers": [1, 10, 100, 1000],
+        "grid": 100,
+    },
+    "full": {
+        "customers": [10**2, 10**3, 10**4, 10**5, 10**6, 10**7],
+        "servers": [1, 10, 100, 1000],
+        "server_customers": 10**5,
+        "charts": [10**4, 10**5],
+        "calc_servers": [1, 10, 100, 1000, 10**4],
+        "grid": 400,
+    },
+}
+
+# ---------- CASES ----------
+def _timed(stages, name, fn, *args, **kwargs):
+    t = time.perf_counter()
+    out = fn(*args, **kwargs)
+    stages[name] = time.perf_counter() - t
+    return out
+
+def _render(fig):
+    # What st.pyplot does: a full draw to PNG
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+
+def simulation_case(customers, servers, priority=False, preemption=False, charts=False, seed=1):
+    model = ModelConfig("MMS", LMBD, servers, priority, preemption)
+    service = ServiceDistribution("exponential", mu=LOAD * LMBD * servers)
+    keep_rows = None if customers <= KEEP_ALL_LIMIT else 0
+
+    def run():
+        stages, last = {}, {}
+        df, summary, gantt = _timed(stages, "simulate", generate_simulation, model, service, rng=seed,
+                                    run_length=RunLength(customers=customers), keep_rows=keep_rows,
+                                    progress=last.update)
+        if charts and keep_rows is None:
+            horizon = summary["Makespan"]
+            times, q_t = _timed(stages, "queue_series", queue_series, df, gantt, horizon)
+            _timed(stages, "time_series_data", get_time_series_data, df, horizon, servers, gantt)
+            _timed(stages, "server_utilization", server_utilization, gantt, servers, horizon)
+            _timed(stages, "steady_state", steady_state, df, gantt, servers)
+            segments = _timed(stages, "gantt_segments", gantt_segments, gantt)
+            _timed(stages, "render_queue", lambda: _render(queue_figure(times, q_t, horizon)))
+            _timed(stages, "render_occupancy", lambda: _render(occupancy_figure(segments, servers, horizon)))
+            _timed(stages, "render_gantt", lambda: _render(gantt_figure(segments, servers, horizon)[0]))
+        return stages, {"events": last["events"], "customers": summary["Customers"]}
+    return run
+
+def calculator_case(fn):
+    # Time per call, with the loop length calibrated once so the timer resolution does not matter
+    calls = [1]
+    def run():
+        while True:
+            t = time.perf_counter()
+            for _ in range(calls[0]):
+                fn()
+            elapsed = time.perf_counter() - t
+            if elapsed >= MIN_CALL_TIME: break
+            calls[0] *= 2
+        return {"per_call": elapsed / calls[0]}, {"calls": calls[0]}
+    return run
+
+# Runs in a fresh interpreter: first run of one app page (cold imports) and a rerun (warm)
+_STARTUP_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app, page, heavy = sys.argv[1], sys.argv[2], sys.argv[3:]
+at = AppTest.from_file(app, default_timeout=120)
+at.session_state["page"] = page
+at.session_state["model"] = "MMS"
+t = time.perf_counter()
+at.run()
+first = time.perf_counter() - t
+t = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - t
+print(json.dumps({"first_run": first, "rerun": rerun, "errors": len(at.exception),
+                  "heavy_modules": [m for m in heavy if m in sys.modules]}))
+"""
+
+def startup_case(page):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(APP_PATH),
+                                                                      os.environ.get("PYTHONPATH")])))
+    def run():
+        out = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT, APP_PATH, page, *HEAVY_MODULES],
+                             capture_output=True, text=True, check=True, env=env)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if result["errors"]: raise RuntimeError(f"App page {page!r} raised an exception")
+        return {"first_run": result["first_run"], "rerun": result["rerun"]}, {"heavy_modules": result["heavy_modules"]}
+    return run
+
+def build_cases(profile):
+    p = PROFILES[profile]
+    cases = {}
+    for n in p["customers"]:
+        cases[f"sim/customers={n}/s=1"] = ({"customers": n, "servers": 1},
+                                             simulation_case(n, 1, charts=n in p["charts"]))
+    n = p["server_customers"]
+    for s in p["servers"]:
+        for priority, preemption in [(False, False), (True, False), (True, True)]:
+            tag = "fifo" if not priority else ("priority" if not preemption else "preemptive")
+            cases[f"sim/customers={n}/s={s}/{tag}"] = (
+                {"customers": n, "servers": s, "priority": priority, "preemption": preemption},
+                simulation_case(n, s, priority, preemption))
+
+    for s in p["calc_servers"]:
+        lmbd, mu = 0.9 * s, 1.0
+        cases[f"calc/erlang_b/s={s}"] = ({"servers": s}, calculator_case(lambda s=s, a=lmbd / mu: erlang_b(s, a)))
+        cases[f"calc/M/M/s/s={s}"] = ({"servers": s}, calculator_case(
+            lambda s=s, lmbd=lmbd: compute_mms(lmbd, mu, s)))
+        cases[f"calc/G/G/s/s={s}"] = ({"servers": s}, calculator_case(
+            lambda s=s, lmbd=lmbd: compute_ggs(lmbd, 1 / lmbd, 1.2 / lmbd ** 2, 1 / mu, 0.5, s)))
+        cases[f"calc/M/G/s/s={s}"] = ({"servers": s}, calculator_case(
+            lambda s=s, lmbd=lmbd: compute_mgs(lmbd, 1 / mu, 0.5, s)))
+        cases[f"calc/min_servers/a={0.9 * s:g}"] = ({"servers": s}, calculator_case(
+            lambda lmbd=lmbd: min_servers("M/M/s", lmbd, mu, "Wq", 0.01)))
+    cases["calc/M/M/1"] = ({}, calculator_case(lambda: compute_mm1(0.9, 1.0)))
+
+    g = p["grid"]
+    lmbd_grid, s_grid = np.meshgrid(np.linspace(0.5, 50, g), np.arange(1, g + 1))
+    for model in ["M/M/s", "G/G/s"]:
+        cases[f"calc/array/{model}/{g}x{g}"] = ({"grid": g}, calculator_case(
+            lambda model=model: compute_model_array(model, lmbd_grid, 1.0, s_grid, 1.2, 0.5)))
+
+    if importlib.util.find_spec("streamlit") is not None:
+        for page in ["start", "model", "run", "calculator"]:
+            params = {"page": page, "subprocess": True}
+            if page == "start":
+                params["budget"] = STARTUP_BUDGET
+            cases[f"app/cold_start/{page}"] = (params, startup_case(page))
+    return cases
+
+def over_budget(result, params):
+    # Landing page budget: cold first run time, and no heavy library loaded
+    if "budget" not in params: return []
+    flags = []
+    if result["stages"]["first_run"] > params["budget"]: flags.append("BUDGET")
+    if result["heavy_modules"]: flags.append("HEAVY IMPORTS")
+    return flags
+
+# ---------- MEASUREMENT ----------
+def measure(run, repeat, memory=True):
+    # Stage-wise best of at least `repeat` runs (more for fast cases, up to 50)
+    best, info, runs, started = None, None, 0, time.perf_counter()
+    while runs < repeat or (time.perf_counter() - started < MIN_CASE_TIME and runs < 50):
+        stages, info = run()
+        best = stages if best is None else {k: min(v, best.get(k, v)) for k, v in stages.items()}
+        runs += 1
+    result = {"seconds": sum(best.values()), "stages": best, "runs": runs, **info}
+    if "events" in info:
+        result["events_per_s"] = info["events"] / best["simulate"]
+    if "per_call" in best:
+        result["calls_per_s"] = 1 / best["per_call"]
+    if memory:
+        tracemalloc.start()
+        run()
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result
+
+def compare(results, baseline, tolerance, mem_tolerance):
+    # One row per case found in both runs; slower / larger beyond the tolerances is a regression
+    rows = []
+    for name, cur in results["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None: continue
+        ratio = cur["seconds"] / base["seconds"] if base["seconds"] > 0 else float("nan")
+        mem_ratio = (cur["peak_mb"] / base["peak_mb"] if base.get("peak_mb") and cur.get("peak_mb") is not None
+                     else float("nan"))
+        flags = []
+        if ratio > 1 + tolerance: flags.append("SLOWER")
+        if mem_ratio > 1 + mem_tolerance and cur["peak_mb"] - base["peak_mb"] > 1.0: flags.append("MEMORY")
+        rows.append({"case": name, "seconds": cur["seconds"], "baseline": base["seconds"], "ratio": ratio,
+                     "mem_ratio": mem_ratio, "flags": flags})
+    return rows
+
+def environment(profile, repeat):
+    return {"profile": profile, "repeat": repeat, "python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation engine, charts and calculator.")
+    parser.add_argument("--profile", choices=list(PROFILES), default="quick")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--out", default="benchmark_results.json", help="results file (JSON)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--mem-tolerance", type=float, default=0.25, help="allowed peak memory growth")
+    args = parser.parse_args(argv)
+
+    results = {"environment": environment(args.profile, args.repeat), "cases": {}}
+    budget_failures = []
+    for name, (params, run) in build_cases(args.profile).items():
+        if args.filter not in name: continue
+        # Memory of a case run in a subprocess is not traced here
+        result = measure(run, args.repeat, memory=not args.no_memory and not params.get("subprocess"))
+        results["cases"][name] = dict(result, params=params)
+        if "events_per_s" in result:
+            rate = f"{result['events_per_s']:>12,.0f} ev/s"
+        elif "calls_per_s" in result:
+            rate = f"{result['calls_per_s']:>12,.0f} calls/s"
+        else:
+            rate = "  ".join(f"{stage} {t:.3f} s" for stage, t in result["stages"].items())
+        memory = f"{result['peak_mb']:8.1f} MB" if "peak_mb" in result else ""
+        flags = over_budget(result, params)
+        if flags:
+            budget_failures.append(name)
+            result["flags"] = flags
+        print(f"{name:<48} {result['seconds']:10.4g} s {rate} {memory} {' '.join(flags)}".rstrip(), flush=True)
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.out}")
+    if budget_failures:
+        print(f"Over budget (first run > {STARTUP_BUDGET} s or heavy imports): {', '.join(budget_failures)}")
+
+    if not args.baseline:
+        return 1 if budget_failures else 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.tolerance, args.mem_tolerance)
+    regressions = [row for row in rows if row["flags"]]
+    for row in rows:
+        print(f"{row['case']:<48} {row['baseline']:10.4g} -> {row['seconds']:10.4g} s  x{row['ratio']:.2f}"
+              f"  mem x{row['mem_ratio']:.2f}  {' '.join(row['flags'])}")
+    print(f"{len(regressions)} regression(s) in {len(rows)} compared cases")
+    return 1 if regressions or budget_failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
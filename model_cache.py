@@ -0,0 +1,40 @@
+from functools import lru_cache
+
+from queuing_models import (
+    compute_mm1, compute_mms, compute_mg1, compute_mgs, compute_gg1, compute_ggs, erlang_table_stats
+)
+from staffing_optimizer import min_servers, min_service_rate, optimal_servers_cost
+
+# Memoized calculator / optimizer results. The cache lives at module level, so every Streamlit
+# session served by this process shares it; it is bounded and evicts least recently used keys.
+#
+#   cached_call("M/M/s", lmbd, mu, s)
+#   cached_call("min_servers", "M/M/s", lmbd, mu, "Wq", 0.5)
+
+RESULT_CACHE_SIZE = 4096
+
+CACHED_FUNCTIONS = {
+    "M/M/1": compute_mm1, "M/M/s": compute_mms, "M/G/1": compute_mg1,
+    "M/G/s": compute_mgs, "G/G/1": compute_gg1, "G/G/s": compute_ggs,
+    "min_servers": min_servers, "min_service_rate": min_service_rate,
+    "optimal_servers_cost": optimal_servers_cost,
+}
+
+def normalize(value):
+    # 12 significant digits: rates converted from per-hour / per-second inputs land on one key
+    if isinstance(value, float): return float(f"{value:.12g}")
+    if hasattr(value, "item"): return normalize(value.item())
+    return value
+
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _cached(name, args):
+    return CACHED_FUNCTIONS[name](*args)
+
+def cached_call(name, *args):
+    # Copy so callers can annotate the result without touching the cached entry
+    return dict(_cached(name, tuple(normalize(a) for a in args)))
+
+def cache_stats():
+    info = _cached.cache_info()
+    return {"results": {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max": info.maxsize},
+            "erlang": erlang_table_stats()}
@@ -1,6 +1,11 @@
 import streamlit as st
 import math
 import time
+import numpy as np
+
+from queuing_models import compute_model_array
+from staffing_optimizer import SIZING_MODELS
+from model_cache import cached_call, cache_stats
 
 # ------------------ CUSTOM CSS ------------------
 def local_css():
@@ -52,67 +57,6 @@ def g_distribution_block(prefix):
     mean = 1 / rate_val if rate_val != 0 else 0
     return {"mean": mean, "var": var, "rate": rate_val, "type": dist, "sd": sd, "raw_val": raw_val, "var_mode": var_mode, "v_input": v_input}
 
-# ------------------ SEPARATE MODEL FUNCTIONS ------------------
-
-def compute_mm1(lmbd, mu):
-    if mu <= lmbd: return {"error": "System unstable (λ ≥ μ)."}
-    rho = lmbd / mu
-    Lq = (rho**2) / (1 - rho)
-    Wq = Lq / lmbd
-    W = Wq + (1 / mu)
-    L = lmbd * W
-    return {"ρ": rho, "P0": 1 - rho, "L": L, "Lq": Lq, "W": W, "Wq": Wq, "Ca2": 1.0, "Cs2": 1.0}
-
-def compute_mms(lmbd, mu, s):
-    rho = lmbd / (s * mu)
-    if rho >= 1: return {"error": "System unstable (ρ ≥ 1)."}
-    a = lmbd / mu
-    P0 = 1 / (sum(a**n / math.factorial(n) for n in range(s)) + a**s / (math.factorial(s) * (1 - rho)))
-    Lq = (P0 * (a**s) * rho) / (math.factorial(s) * ((1 - rho)**2))
-    Wq = Lq / lmbd
-    W = Wq + (1 / mu)
-    L = lmbd * W
-    return {"ρ": rho, "P0": P0, "Lq": Lq, "L": L, "Wq": Wq, "W": W, "Ca2": 1.0, "Cs2": 1.0}
-
-def compute_mg1(lmbd, ms, vs):
-    mu = 1 / ms if ms != 0 else 0
-    if mu <= lmbd: return {"error": "System unstable (λ ≥ μ)."}
-    rho = lmbd / mu
-    Lq = ( (lmbd**2 * vs) + (rho**2) ) / (2 * (1 - rho))
-    Wq = Lq / lmbd
-    W = Wq + ms
-    L = lmbd * W
-    return {"ρ": rho, "Lq": Lq, "L": L, "Wq": Wq, "W": W, "P0": 1 - rho, "Ca2": 1.0, "Cs2": vs * (mu**2)}
-
-def compute_mgs(lmbd, ms, vs, s):
-    mu = 1 / ms if ms != 0 else 0
-    base = compute_mms(lmbd, mu, s)
-    if "error" in base: return base
-    Cs2 = vs * (mu**2)
-    Wq = base["Wq"] * (1 + Cs2) / 2
-    return {"ρ": base["ρ"], "Lq": lmbd * Wq, "L": lmbd * (Wq + ms), "Wq": Wq, "W": Wq + ms, "P0": base["P0"], "Ca2": 1.0, "Cs2": Cs2}
-
-def compute_gg1(lmbd, ma, va, ms, vs):
-    mu = 1 / ms if ms != 0 else 0
-    if mu <= lmbd: return {"error": "System unstable (λ ≥ μ)."}
-    rho = lmbd / mu
-    Ca2 = va / (1 / lmbd)**2
-    Cs2 = vs / (1 / mu)**2
-    Lq = (rho**2 * (1 + Cs2) * (Ca2 + rho**2 * Cs2)) / (2 * (1 - rho) * (1 + rho**2 * Cs2))
-    Wq = Lq / lmbd
-    W = Wq + ms
-    L = lmbd * W
-    return {"ρ": rho, "Lq": Lq, "L": L, "Wq": Wq, "W": W, "P0": 1 - rho, "Ca2": Ca2, "Cs2": Cs2}
-
-def compute_ggs(lmbd, ma, va, ms, vs, s):
-    mu = 1 / ms if ms != 0 else 0
-    base = compute_mms(lmbd, mu, s)
-    if "error" in base: return base
-    Ca2 = va * (lmbd**2)
-    Cs2 = vs * (mu**2)
-    Wq = base["Wq"] * ((Ca2 + Cs2) / 2)
-    return {"ρ": base["ρ"], "Lq": lmbd * Wq, "L": lmbd * (Wq + ms), "Wq": Wq, "W": Wq + ms, "P0": base["P0"], "Ca2": Ca2, "Cs2": Cs2}
-
 # ------------------ DISPLAY ------------------
 def display_results(res):
     if "error" in res:
@@ -128,12 +72,14 @@ def display_results(res):
         
         # Row 1: Key Metrics
         st.subheader("🚀 System Efficiency")
-        c1, c2, c3 = st.columns(3)
+        c1, c2, c3, c4 = st.columns(4)
         with c1:
             st.metric("Utilization (ρ)", f"{res['ρ']*100:.1f}%")
         with c2:
             st.metric("Idle Probability (P₀)", f"{res.get('P0', 0)*100:.1f}%", help="Probablity of having zero customers in the system")
         with c3:
+            st.metric("Prob. of Waiting (P_w)", f"{res.get('Pw', 0)*100:.1f}%", help="Probability that an arriving customer has to wait (Erlang C for multi-server models)")
+        with c4:
             st.metric("Avg in System (Ls)", f"{res['L']:.2f}", help="Average number of customers in the system")
 
         st.markdown("<br>", unsafe_allow_html=True)
@@ -160,11 +106,222 @@ def display_results(res):
             
         st.markdown('</div>', unsafe_allow_html=True)
 
+# ------------------ SENSITIVITY HEATMAP ------------------
+MODELS = ["M/M/1", "M/M/s", "M/G/1", "M/G/s", "G/G/1", "G/G/s"]
+
+HEATMAP_METRICS = {
+    "Wq": "Wait in Queue (Wq)", "W": "Wait in System (Ws)", "Lq": "Avg in Queue (Lq)",
+    "L": "Avg in System (Ls)", "ρ": "Utilization (ρ)", "Pw": "Prob. of Waiting (P_w)", "P0": "Idle Probability (P₀)",
+}
+
+# parameter key -> (label, default min, default max, default fixed value)
+HEATMAP_PARAMS = {
+    "lmbd": ("λ (Arrival Rate, per min)", 0.1, 10.0, 1.0),
+    "mu": ("μ (Service Rate, per min)", 0.5, 10.0, 1.5),
+    "s": ("s (Servers)", 1, 20, 2),
+    "ca2": ("Ca² (Arrival CV²)", 0.0, 3.0, 1.0),
+    "cs2": ("Cs² (Service CV²)", 0.0, 3.0, 1.0),
+}
+
+def heatmap_params(model):
+    params = ["lmbd", "mu"]
+    if model.endswith("s"): params.append("s")
+    if model.startswith("G"): params.append("ca2")
+    if "G" in model: params.append("cs2")
+    return params
+
+def heatmap_axis(key, lo, hi, points):
+    if key == "s":
+        return np.unique(np.linspace(int(lo), int(hi), points).round().astype(np.int64))
+    return np.linspace(lo, hi, points)
+
+def sensitivity_heatmap_ui():
+    # matplotlib is only needed here, so the Calculator and Staffing Optimizer modes start without it
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    model = st.selectbox("Select Model", MODELS, key="hm_model")
+    params = heatmap_params(model)
+    label = lambda k: HEATMAP_PARAMS[k][0]
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        x_key = st.selectbox("X Axis", params, format_func=label, key="hm_x")
+    with c2:
+        y_key = st.selectbox("Y Axis", [p for p in params if p != x_key], format_func=label, key="hm_y")
+    with c3:
+        metric = st.selectbox("Metric", list(HEATMAP_METRICS), format_func=HEATMAP_METRICS.get, key="hm_metric")
+
+    axes = {}
+    for key, name in [(x_key, "X"), (y_key, "Y")]:
+        _, lo, hi, _ = HEATMAP_PARAMS[key]
+        r1, r2 = st.columns(2)
+        with r1:
+            lo = st.number_input(f"{name}: {label(key)} from", value=lo, key=f"hm_{key}_lo")
+        with r2:
+            hi = st.number_input(f"{name}: {label(key)} to", value=hi, key=f"hm_{key}_hi")
+        axes[key] = (lo, hi)
+
+    fixed = {}
+    others = [p for p in params if p not in axes]
+    if others:
+        st.markdown("##### Fixed Parameters")
+        f_cols = st.columns(len(others))
+        for col, key in zip(f_cols, others):
+            with col:
+                fixed[key] = st.number_input(label(key), value=HEATMAP_PARAMS[key][3], key=f"hm_{key}_fixed")
+
+    points = st.slider("Grid Resolution (points per axis)", 50, 1000, 300, step=50, key="hm_points")
+    log_scale = st.checkbox("Log color scale", value=metric in ["Wq", "W", "Lq", "L"], key="hm_log")
+
+    errors = []
+    for key, (lo, hi) in axes.items():
+        if hi <= lo: errors.append(f"{label(key)}: upper bound must be greater than lower bound.")
+        if key in ["lmbd", "mu"] and lo <= 0: errors.append(f"{label(key)}: values must be > 0.")
+        if key == "s" and lo < 1: errors.append("Servers must be 1 or more.")
+        if key in ["ca2", "cs2"] and lo < 0: errors.append(f"{label(key)}: values cannot be negative.")
+    for key, value in fixed.items():
+        if key in ["lmbd", "mu", "s"] and value <= 0: errors.append(f"{label(key)} must be > 0.")
+        if key in ["ca2", "cs2"] and value < 0: errors.append(f"{label(key)} cannot be negative.")
+    if errors:
+        for e in errors: st.error(f"Invalid Input: {e}")
+        return
+
+    x = heatmap_axis(x_key, *axes[x_key], points)
+    y = heatmap_axis(y_key, *axes[y_key], points)
+    grid = dict(fixed)
+    grid[x_key], grid[y_key] = np.meshgrid(x, y)
+    if "s" in grid: grid["s"] = np.asarray(grid["s"]).astype(np.int64)
+
+    started = time.perf_counter()
+    res = compute_model_array(model, **grid)
+    elapsed = time.perf_counter() - started
+
+    z = np.ma.masked_invalid(res[metric])
+    cmap = plt.get_cmap("viridis").copy()
+    cmap.set_bad("#E0E0E0")
+    norm = LogNorm() if log_scale and z.count() and z.min() > 0 else None
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    img = ax.imshow(z, origin="lower", aspect="auto", cmap=cmap, norm=norm,
+                    extent=[x[0], x[-1], y[0], y[-1]], interpolation="nearest")
+    fig.colorbar(img, ax=ax, label=HEATMAP_METRICS[metric])
+    ax.set_xlabel(label(x_key))
+    ax.set_ylabel(label(y_key))
+    ax.set_title(f"{model}: {HEATMAP_METRICS[metric]}", loc="left", fontweight="bold")
+    plt.tight_layout()
+    st.pyplot(fig)
+    plt.close(fig)
+
+    stable = res["stable"]
+    st.caption(f"{stable.size:,} grid points evaluated in {elapsed * 1000:.0f} ms — "
+               f"{stable.mean():.1%} stable; grey cells are unstable (ρ ≥ 1).")
+
+# ------------------ STAFFING OPTIMIZER ------------------
+OPTIMIZER_GOALS = ["Minimum Servers", "Minimum Service Rate", "Minimum Total Cost"]
+
+OPTIMIZER_TARGETS = {
+    "Wq": "Wait in Queue (Wq, minutes)", "Pw": "Prob. of Waiting (P_w, %)", "ρ": "Utilization (ρ, %)",
+}
+
+def staffing_optimizer_ui():
+    model = st.selectbox("Select Model", SIZING_MODELS, key="opt_model")
+    goal = st.radio("Optimize For", OPTIMIZER_GOALS, horizontal=True, key="opt_goal")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        lmbd = st.number_input("λ (Arrival Rate, per min)", value=10.0, key="opt_lmbd")
+    with c2:
+        if goal == "Minimum Service Rate":
+            s = st.number_input("Servers (s)", value=12, key="opt_s")
+        else:
+            mu = st.number_input("μ (Service Rate per server, per min)", value=1.0, key="opt_mu")
+
+    ca2 = cs2 = 1.0
+    if model != "M/M/s":
+        v1, v2 = st.columns(2)
+        with v1:
+            if model == "G/G/s": ca2 = st.number_input("Ca² (Arrival CV²)", value=1.0, key="opt_ca2")
+        with v2:
+            cs2 = st.number_input("Cs² (Service CV²)", value=1.0, key="opt_cs2")
+
+    if goal == "Minimum Total Cost":
+        k1, k2 = st.columns(2)
+        with k1:
+            server_cost = st.number_input("Server Cost (per server per hour)", value=20.0, key="opt_server_cost")
+        with k2:
+            wait_cost = st.number_input("Waiting Cost (per waiting customer per hour)", value=30.0, key="opt_wait_cost")
+    else:
+        t1, t2 = st.columns(2)
+        with t1:
+            target = st.selectbox("Target", list(OPTIMIZER_TARGETS), format_func=OPTIMIZER_TARGETS.get, key="opt_target")
+        with t2:
+            limit = st.number_input("Must Not Exceed", value=0.5 if target == "Wq" else 80.0, key=f"opt_limit_{target}")
+
+    if st.button("Optimize", type="primary"):
+        started = time.perf_counter()
+        if goal == "Minimum Total Cost":
+            res = cached_call("optimal_servers_cost", model, lmbd, mu, server_cost, wait_cost, ca2, cs2)
+        else:
+            if target != "Wq": limit /= 100
+            if goal == "Minimum Servers":
+                res = cached_call("min_servers", model, lmbd, mu, target, limit, ca2, cs2)
+            else:
+                res = cached_call("min_service_rate", model, lmbd, int(s), target, limit, ca2, cs2)
+        elapsed = time.perf_counter() - started
+
+        if "error" in res:
+            display_results(res)
+            return
+        st.write("---")
+        st.header("🎯 Optimum")
+        o1, o2, o3 = st.columns(3)
+        with o1:
+            st.metric("Servers (s)", f"{res['s']:,}")
+        with o2:
+            st.metric("Service Rate (μ)", f"{res['μ']:.4f} /min", help="Per-server service rate; mean service time = 1/μ")
+        with o3:
+            if goal == "Minimum Total Cost":
+                st.metric("Total Cost", f"{res['Total Cost']:,.2f} /h",
+                          help=f"Servers {res['Server Cost']:,.2f} + waiting {res['Waiting Cost']:,.2f} per hour")
+            else:
+                st.metric(OPTIMIZER_TARGETS[target].split(" (")[0], f"{res[target]:.4f}" if target == "Wq" else f"{res[target]*100:.2f}%")
+        st.caption(f"Found in {elapsed * 1000:.1f} ms ({res['Evaluations']} model evaluations).")
+        display_results(res)
+
+# ------------------ CACHE STATISTICS ------------------
+def cache_stats_ui():
+    stats = cache_stats()
+    res, erl = stats["results"], stats["erlang"]
+    lookups = res["hits"] + res["misses"]
+    with st.expander("🗄️ Cache Statistics (shared by all sessions)"):
+        c1, c2, c3, c4 = st.columns(4)
+        with c1:
+            st.metric("Result Hits", f"{res['hits']:,}", help="Calculator / optimizer results served from the cache")
+        with c2:
+            st.metric("Result Misses", f"{res['misses']:,}")
+        with c3:
+            st.metric("Hit Rate", f"{res['hits'] / lookups:.1%}" if lookups else "–")
+        with c4:
+            st.metric("Cached Results", f"{res['size']:,} / {res['max']:,}")
+        st.caption(f"Erlang B tables: {erl['hits']:,} hits, {erl['misses']:,} misses, "
+                   f"{erl['tables']:,} offered loads, {erl['entries']:,} stored values.")
+
 # ------------------ UI ------------------
 def queuing_calculator_ui():
     local_css()
     #st.title("Queuing Theory Calculator")
-    model = st.selectbox("Select Model", ["M/M/1", "M/M/s", "M/G/1", "M/G/s", "G/G/1", "G/G/s"])
+    mode = st.radio("Mode", ["Calculator", "Sensitivity Heatmap", "Staffing Optimizer"], horizontal=True, key="calc_mode")
+    if mode == "Sensitivity Heatmap":
+        sensitivity_heatmap_ui()
+    elif mode == "Staffing Optimizer":
+        staffing_optimizer_ui()
+    else:
+        calculator_ui()
+    cache_stats_ui()
+
+def calculator_ui():
+    model = st.selectbox("Select Model", MODELS)
 
     s = 1
     if model.endswith("s"):
@@ -190,14 +347,6 @@ def queuing_calculator_ui():
         ms, vs = (1/mu if mu!=0 else 0), 0
 
     if st.button("Calculate", type="primary"):
-        # --- Loading Bar ---
-        progress_text = "Calculating... Please wait."
-        my_bar = st.progress(0, text=progress_text)
-        for pct in range(100):
-            time.sleep(0.01)
-            my_bar.progress(pct + 1, text=progress_text)
-        my_bar.empty() 
-
         errors = []
         if model.endswith("s") and s <= 0: errors.append("Servers must be 1 or more.")
         if arr_data["type"] == "Uniform":
@@ -217,12 +366,12 @@ def queuing_calculator_ui():
         if errors:
             for e in errors: st.error(f"Invalid Input: {e}")
         else:
-            if model == "M/M/1": display_results(compute_mm1(lmbd, mu))
-            elif model == "M/M/s": display_results(compute_mms(lmbd, mu, s))
-            elif model == "M/G/1": display_results(compute_mg1(lmbd, ms, vs))
-            elif model == "M/G/s": display_results(compute_mgs(lmbd, ms, vs, s))
-            elif model == "G/G/1": display_results(compute_gg1(lmbd, ma, va, ms, vs))
-            elif model == "G/G/s": display_results(compute_ggs(lmbd, ma, va, ms, vs, s))
+            if model == "M/M/1": display_results(cached_call(model, lmbd, mu))
+            elif model == "M/M/s": display_results(cached_call(model, lmbd, mu, s))
+            elif model == "M/G/1": display_results(cached_call(model, lmbd, ms, vs))
+            elif model == "M/G/s": display_results(cached_call(model, lmbd, ms, vs, s))
+            elif model == "G/G/1": display_results(cached_call(model, lmbd, ma, va, ms, vs))
+            elif model == "G/G/s": display_results(cached_call(model, lmbd, ma, va, ms, vs, s))
 
 if __name__ == "__main__":
     queuing_calculator_ui()
\ No newline at end of file
@@ -0,0 +1,276 @@
+import math
+import threading
+import numpy as np
+from array import array
+from collections import OrderedDict
+
+# Closed-form queuing models shared by the calculator, the simulator and scripts
+
+# ------------------ ERLANG B / C CORE ------------------
+def erlang_b(s, a):
+    # Erlang B by the stable recurrence B(k) = a B(k-1) / (k + a B(k-1)), B(0) = 1: O(s), never overflows
+    b = 1.0
+    for k in range(1, s + 1):
+        ab = a * b
+        b = ab / (k + ab)
+    return b
+
+def erlang_c_from_b(s, a, b):
+    # Probability of waiting in M/M/s from the Erlang B value (requires a < s)
+    return s * b / (s - a * (1 - b))
+
+def erlang_c(s, a):
+    return erlang_c_from_b(s, a, erlang_b(s, a))
+
+# Shared Erlang B tables: one recurrence run for an offered load a yields B(k, a) for every
+# k <= s, so the table is kept and later queries for the same load at any s up to its length
+# are lookups (or extend it from its last entry). Tables are process-wide, so concurrent
+# Streamlit sessions reuse each other's work; least recently used loads are dropped once the
+# total entry budget is exceeded.
+# Tables are built on first use of a load rather than precomputed: loads are continuous
+# (λ / μ from user input), so a precomputed grid would only be hit by interpolating between
+# its loads, which would make results depend on the grid. Building a table costs the same
+# O(s) recurrence as one uncached erlang_b call, so a first query is never slower than
+# without tables, and the staffing searches' sweeps over s fill a table in one pass.
+ERLANG_TABLE_MAX_S = 20000
+ERLANG_TABLE_BUDGET = 10**6  # float64 entries over all tables (8 MB)
+_erlang_tables = OrderedDict()
+_erlang_stats = {"hits": 0, "misses": 0, "entries": 0}
+_erlang_lock = threading.Lock()
+
+def erlang_b_lookup(s, a):
+    if s > ERLANG_TABLE_MAX_S: return erlang_b(s, a)
+    key = float(f"{a:.12g}")
+    with _erlang_lock:
+        table = _erlang_tables.get(key)
+        if table is not None and len(table) > s:
+            _erlang_tables.move_to_end(key)
+            _erlang_stats["hits"] += 1
+            return table[s]
+        _erlang_stats["misses"] += 1
+        if table is None:
+            table = _erlang_tables[key] = array("d", [1.0])
+            _erlang_stats["entries"] += 1
+        _erlang_tables.move_to_end(key)
+        b, start = table[-1], len(table)
+        for k in range(start, s + 1):
+            ab = a * b
+            b = ab / (k + ab)
+            table.append(b)
+        _erlang_stats["entries"] += s + 1 - start
+        while _erlang_stats["entries"] > ERLANG_TABLE_BUDGET and len(_erlang_tables) > 1:
+            _erlang_stats["entries"] -= len(_erlang_tables.popitem(last=False)[1])
+        return b
+
+def erlang_table_stats():
+    with _erlang_lock:
+        return dict(_erlang_stats, tables=len(_erlang_tables))
+
+def mms_p0(s, a, C):
+    # P0 = C (1 - ρ) s! / a^s, evaluated in log space; if C underflowed the tail beyond s
+    # is negligible and P0 = e^(-a) to full precision
+    if a <= 0: return 1.0
+    if C <= 0: return math.exp(-a)
+    log_p0 = math.log(C) + math.log1p(-a / s) + math.lgamma(s + 1) - s * math.log(a)
+    return math.exp(log_p0)
+
+# ------------------ SEPARATE MODEL FUNCTIONS ------------------
+
+def compute_mm1(lmbd, mu):
+    if mu <= lmbd: return {"error": "System unstable (λ ≥ μ)."}
+    rho = lmbd / mu
+    Lq = (rho**2) / (1 - rho)
+    Wq = Lq / lmbd
+    W = Wq + (1 / mu)
+    L = lmbd * W
+    return {"ρ": rho, "P0": 1 - rho, "L": L, "Lq": Lq, "W": W, "Wq": Wq, "Pw": rho, "Ca2": 1.0, "Cs2": 1.0}
+
+def compute_mms(lmbd, mu, s):
+    rho = lmbd / (s * mu)
+    if rho >= 1: return {"error": "System unstable (ρ ≥ 1)."}
+    a = lmbd / mu
+    C = erlang_c_from_b(s, a, erlang_b_lookup(s, a))
+    P0 = mms_p0(s, a, C)
+    Lq = C * rho / (1 - rho)
+    Wq = Lq / lmbd
+    W = Wq + (1 / mu)
+    L = lmbd * W
+    return {"ρ": rho, "P0": P0, "Lq": Lq, "L": L, "Wq": Wq, "W": W, "Pw": C, "Ca2": 1.0, "Cs2": 1.0}
+
+def compute_mg1(lmbd, ms, vs):
+    mu = 1 / ms if ms != 0 else 0
+    if mu <= lmbd: return {"error": "System unstable (λ ≥ μ)."}
+    rho = lmbd / mu
+    Lq = ( (lmbd**2 * vs) + (rho**2) ) / (2 * (1 - rho))
+    Wq = Lq / lmbd
+    W = Wq + ms
+    L = lmbd * W
+    return {"ρ": rho, "Lq": Lq, "L": L, "Wq": Wq, "W": W, "P0": 1 - rho, "Pw": rho, "Ca2": 1.0, "Cs2": vs * (mu**2)}
+
+def compute_mgs(lmbd, ms, vs, s):
+    mu = 1 / ms if ms != 0 else 0
+    base = compute_mms(lmbd, mu, s)
+    if "error" in base: return base
+    Cs2 = vs * (mu**2)
+    Wq = base["Wq"] * (1 + Cs2) / 2
+    return {"ρ": base["ρ"], "Lq": lmbd * Wq, "L": lmbd * (Wq + ms), "Wq": Wq, "W": Wq + ms, "P0": base["P0"], "Pw": base["Pw"], "Ca2": 1.0, "Cs2": Cs2}
+
+def compute_gg1(lmbd, ma, va, ms, vs):
+    mu = 1 / ms if ms != 0 else 0
+    if mu <= lmbd: return {"error": "System unstable (λ ≥ μ)."}
+    rho = lmbd / mu
+    Ca2 = va / (1 / lmbd)**2
+    Cs2 = vs / (1 / mu)**2
+    Lq = (rho**2 * (1 + Cs2) * (Ca2 + rho**2 * Cs2)) / (2 * (1 - rho) * (1 + rho**2 * Cs2))
+    Wq = Lq / lmbd
+    W = Wq + ms
+    L = lmbd * W
+    return {"ρ": rho, "Lq": Lq, "L": L, "Wq": Wq, "W": W, "P0": 1 - rho, "Pw": rho, "Ca2": Ca2, "Cs2": Cs2}
+
+def compute_ggs(lmbd, ma, va, ms, vs, s):
+    mu = 1 / ms if ms != 0 else 0
+    base = compute_mms(lmbd, mu, s)
+    if "error" in base: return base
+    Ca2 = va * (lmbd**2)
+    Cs2 = vs * (mu**2)
+    Wq = base["Wq"] * ((Ca2 + Cs2) / 2)
+    return {"ρ": base["ρ"], "Lq": lmbd * Wq, "L": lmbd * (Wq + ms), "Wq": Wq, "W": Wq + ms, "P0": base["P0"], "Pw": base["Pw"], "Ca2": Ca2, "Cs2": Cs2}
+
+# ------------------ ARRAY (BATCH) VERSIONS ------------------
+# Same models over NumPy arrays / broadcastable grids. Results are columnar dicts of arrays;
+# unstable or invalid points are NaN and flagged False in "stable" instead of error dicts.
+
+def erlang_b_array(s, a):
+    # Erlang B recurrence run for every point at once; points are ordered by s so step k
+    # only touches the points that still need it (total work = sum of s over the grid)
+    s, a = np.broadcast_arrays(np.asarray(s, dtype=np.int64), np.asarray(a, dtype=float))
+    flat_s, flat_a = s.ravel(), a.ravel()
+    order = np.argsort(-flat_s, kind="stable")
+    s_sorted, a_sorted = flat_s[order], flat_a[order]
+    b = np.ones(len(order))
+    active = len(order)
+    for k in range(1, int(s_sorted[0]) + 1 if len(order) else 1):
+        while active and s_sorted[active - 1] < k:
+            active -= 1
+        ab = a_sorted[:active] * b[:active]
+        b[:active] = ab / (k + ab)
+    out = np.empty(len(order))
+    out[order] = b
+    return out.reshape(s.shape)
+
+def erlang_c_array(s, a):
+    s, a = np.broadcast_arrays(np.asarray(s, dtype=np.int64), np.asarray(a, dtype=float))
+    b = erlang_b_array(s, a)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c = s * b / (s - a * (1 - b))
+    return np.where(a < s, c, np.nan)
+
+def _mms_p0_array(s, a, C):
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        log_p0 = np.log(C) + np.log1p(-a / s) + _lgamma(s + 1) - s * np.log(a)
+        p0 = np.where(C > 0, np.exp(log_p0), np.exp(-a))
+    return np.where(a > 0, p0, 1.0)
+
+def _lgamma(x):
+    # lgamma over the (few) distinct server counts of the grid
+    values, inverse = np.unique(x, return_inverse=True)
+    return np.array([math.lgamma(v) for v in values])[inverse].reshape(np.shape(x))
+
+def _columns(stable, **cols):
+    res = {k: np.where(stable, v, np.nan) for k, v in cols.items()}
+    res["stable"] = stable
+    return res
+
+def compute_mm1_array(lmbd, mu):
+    lmbd, mu = np.broadcast_arrays(np.asarray(lmbd, dtype=float), np.asarray(mu, dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stable = (lmbd > 0) & (mu > lmbd)
+        rho = lmbd / mu
+        Lq = rho**2 / (1 - rho)
+        Wq = Lq / lmbd
+        W = Wq + 1 / mu
+        L = lmbd * W
+    return _columns(stable, **{"ρ": rho, "P0": 1 - rho, "L": L, "Lq": Lq, "W": W, "Wq": Wq, "Pw": rho,
+                               "Ca2": np.ones_like(rho), "Cs2": np.ones_like(rho)})
+
+def compute_mms_array(lmbd, mu, s):
+    lmbd, mu, s = np.broadcast_arrays(np.asarray(lmbd, dtype=float), np.asarray(mu, dtype=float),
+                                      np.asarray(s, dtype=np.int64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho = lmbd / (s * mu)
+        stable = (lmbd > 0) & (mu > 0) & (s >= 1) & (rho < 1)
+        a = np.where(stable, lmbd / mu, 0.0)
+        s_safe = np.where(stable, s, 1)
+        C = erlang_c_array(s_safe, a)
+        P0 = _mms_p0_array(s_safe, a, C)
+        Lq = C * rho / (1 - rho)
+        Wq = Lq / lmbd
+        W = Wq + 1 / mu
+        L = lmbd * W
+    return _columns(stable, **{"ρ": rho, "P0": P0, "Lq": Lq, "L": L, "Wq": Wq, "W": W, "Pw": C,
+                               "Ca2": np.ones_like(rho), "Cs2": np.ones_like(rho)})
+
+def compute_mg1_array(lmbd, ms, vs):
+    lmbd, ms, vs = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (lmbd, ms, vs)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = np.where(ms != 0, 1 / ms, 0.0)
+        stable = (lmbd > 0) & (mu > lmbd)
+        rho = lmbd / mu
+        Lq = (lmbd**2 * vs + rho**2) / (2 * (1 - rho))
+        Wq = Lq / lmbd
+        W = Wq + ms
+        L = lmbd * W
+    return _columns(stable, **{"ρ": rho, "Lq": Lq, "L": L, "Wq": Wq, "W": W, "P0": 1 - rho, "Pw": rho,
+                               "Ca2": np.ones_like(rho), "Cs2": vs * mu**2})
+
+def compute_mgs_array(lmbd, ms, vs, s):
+    lmbd, ms, vs = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (lmbd, ms, vs)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = np.where(ms != 0, 1 / ms, 0.0)
+        base = compute_mms_array(lmbd, mu, s)
+        Cs2 = vs * mu**2
+        Wq = base["Wq"] * (1 + Cs2) / 2
+    return _columns(base["stable"], **{"ρ": base["ρ"], "Lq": lmbd * Wq, "L": lmbd * (Wq + ms), "Wq": Wq,
+                                       "W": Wq + ms, "P0": base["P0"], "Pw": base["Pw"],
+                                       "Ca2": np.ones_like(Wq), "Cs2": Cs2})
+
+def compute_gg1_array(lmbd, ma, va, ms, vs):
+    lmbd, ma, va, ms, vs = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (lmbd, ma, va, ms, vs)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = np.where(ms != 0, 1 / ms, 0.0)
+        stable = (lmbd > 0) & (mu > lmbd)
+        rho = lmbd / mu
+        Ca2 = va / (1 / lmbd)**2
+        Cs2 = vs / (1 / mu)**2
+        Lq = (rho**2 * (1 + Cs2) * (Ca2 + rho**2 * Cs2)) / (2 * (1 - rho) * (1 + rho**2 * Cs2))
+        Wq = Lq / lmbd
+        W = Wq + ms
+        L = lmbd * W
+    return _columns(stable, **{"ρ": rho, "Lq": Lq, "L": L, "Wq": Wq, "W": W, "P0": 1 - rho, "Pw": rho,
+                               "Ca2": Ca2, "Cs2": Cs2})
+
+def compute_ggs_array(lmbd, ma, va, ms, vs, s):
+    lmbd, ma, va, ms, vs = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (lmbd, ma, va, ms, vs)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = np.where(ms != 0, 1 / ms, 0.0)
+        base = compute_mms_array(lmbd, mu, s)
+        Ca2 = va * lmbd**2
+        Cs2 = vs * mu**2
+        Wq = base["Wq"] * ((Ca2 + Cs2) / 2)
+    return _columns(base["stable"], **{"ρ": base["ρ"], "Lq": lmbd * Wq, "L": lmbd * (Wq + ms), "Wq": Wq,
+                                       "W": Wq + ms, "P0": base["P0"], "Pw": base["Pw"], "Ca2": Ca2, "Cs2": Cs2})
+
+def compute_model_array(model, lmbd, mu, s=1, ca2=1.0, cs2=1.0):
+    # One entry point over (λ, μ, s, Ca², Cs²) grids for every calculator model
+    lmbd, mu = np.asarray(lmbd, dtype=float), np.asarray(mu, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ms = np.where(mu != 0, 1 / mu, 0.0)
+        ma = np.where(lmbd != 0, 1 / lmbd, 0.0)
+        vs, va = cs2 * ms**2, ca2 * ma**2
+    if model == "M/M/1": return compute_mm1_array(lmbd, mu)
+    if model == "M/M/s": return compute_mms_array(lmbd, mu, s)
+    if model == "M/G/1": return compute_mg1_array(lmbd, ms, vs)
+    if model == "M/G/s": return compute_mgs_array(lmbd, ms, vs, s)
+    if model == "G/G/1": return compute_gg1_array(lmbd, ma, va, ms, vs)
+    if model == "G/G/s": return compute_ggs_array(lmbd, ma, va, ms, vs, s)
+    raise ValueError(f"Unknown model: {model}")
@@ -0,0 +1,283 @@
+import os, math, time
+import multiprocessing as mp
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+
+from simulation_engine import generate_simulation, input_means, input_variances, new_seed, SimulationCancelled
+from queuing_models import compute_mm1, compute_mms, compute_mg1, compute_mgs, compute_gg1, compute_ggs
+from sim_stats import confidence_interval, student_t_ppf
+
+# Independent replications of the simulation engine, spread over a process pool, with optional
+# variance reduction: antithetic pairs, control variates on the sampled input means, and common
+# random numbers when comparing two configurations. run_until_precision adds replications until
+# a metric's confidence interval is as narrow as asked for.
+#
+# Every replication gets its own child of np.random.SeedSequence(seed), fixed before any work is
+# handed out, so a study is reproducible from its seed and bit-identical whether it runs serially
+# or on any number of workers.
+
+REPLICATION_METRICS = {
+    "Wq": "Avg Waiting",
+    "W": "Avg Turnaround",
+    "Response": "Avg Response",
+    "Utilization": "Utilization",
+}
+# Controls with exactly known expectations (input_means); the closed-form queue metrics are not
+# used as controls because they are not the exact means of the discretized simulated system
+CONTROL_METRICS = ["Avg Service", "Avg Inter Arrival"]
+CONTROL_RUN_LENGTH_ERROR = ("Control variates need a run length given as a number of customers only: with a "
+                            "time horizon or completion count, which customers are counted depends on the "
+                            "sampled inputs, so their means are biased controls.")
+
+def fixed_customer_count(run_length):
+    # The controls average over the customers a run completes; input_means is their expectation only
+    # when a fixed number of customers is admitted and every one of them completes
+    return run_length is None or (run_length.horizon is None and run_length.completions is None)
+
+def _pool_context():
+    # forkserver/spawn avoid forking a multi-threaded parent (e.g. the Streamlit server)
+    methods = mp.get_all_start_methods()
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+def _replicate(task):
+    model, service, run_length, seed_seq, antithetic = task
+    _, summary, _ = generate_simulation(model, service, rng=seed_seq, run_length=run_length, antithetic=antithetic)
+    row = {name: summary[key] for name, key in REPLICATION_METRICS.items()}
+    row.update({key: summary[key] for key in CONTROL_METRICS})
+    return row
+
+def _replicate_chunk(tasks):
+    return [_replicate(task) for task in tasks]
+
+def control_variate_interval(values, controls, means, confidence=0.95):
+    # Linear control variates: regress the output on the centered controls; the intercept is the
+    # adjusted mean and its OLS standard error (n - q - 1 degrees of freedom) gives the interval
+    y = np.asarray(values, dtype=float)
+    x = np.asarray(controls, dtype=float) - np.asarray(means, dtype=float)
+    n, q = x.shape
+    if n < q + 3:
+        return confidence_interval(values, confidence)
+    z = np.column_stack([np.ones(n), x])
+    coef = np.linalg.lstsq(z, y, rcond=None)[0]
+    resid = y - z @ coef
+    var = float(resid @ resid) / (n - q - 1)
+    se = math.sqrt(var * np.linalg.pinv(z.T @ z)[0, 0])
+    half = student_t_ppf(0.5 + confidence / 2, n - q - 1) * se
+    mean = float(coef[0])
+    return {"mean": mean, "std": math.sqrt(var), "half_width": half, "low": mean - half, "high": mean + half,
+            "n": n, "beta": coef[1:].tolist()}
+
+def _tasks(model, service, run_length, seed, start, count, antithetic):
+    # Replications start..start+count-1. Child r is SeedSequence(seed).spawn(...)[r] (antithetic:
+    # pair r // 2), derived by index so a study can be extended without changing its first runs.
+    tasks = []
+    for r in range(start, start + count):
+        child = r // 2 if antithetic else r
+        tasks.append((model, service, run_length, np.random.SeedSequence(seed, spawn_key=(child,)),
+                      antithetic and r % 2 == 1))
+    return tasks
+
+def _execute(tasks, pool, workers, done=0, total=None, progress=None, cancel=None):
+    # Runs the tasks serially (pool None) or on the pool and returns their rows in task order;
+    # progress(done, total) counts from `done`
+    total = total or done + len(tasks)
+    if pool is None:
+        rows = []
+        for task in tasks:
+            if cancel is not None and cancel.cancelled:
+                raise SimulationCancelled(f"Replications cancelled after {done + len(rows)} of {total}.")
+            rows.append(_replicate(task))
+            if progress is not None: progress(done + len(rows), total)
+        return rows
+    # A few chunks per worker keeps the pool balanced without per-task IPC overhead
+    size = math.ceil(len(tasks) / (workers * 4))
+    chunks = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+    results = [None] * len(chunks)
+    futures = {pool.submit(_replicate_chunk, chunk): k for k, chunk in enumerate(chunks)}
+    for future in as_completed(futures):
+        results[futures[future]] = future.result()
+        done += len(results[futures[future]])
+        if progress is not None: progress(done, total)
+        if cancel is not None and cancel.cancelled:
+            for f in futures: f.cancel()
+            raise SimulationCancelled(f"Replications cancelled after {done} of {total}.")
+    return [row for rows in results for row in rows]
+
+def _pool(workers):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) if workers > 1 else nullcontext()
+
+def _observations(per_rep, antithetic):
+    # One observation per replication, or the average of each antithetic pair
+    if not antithetic:
+        return per_rep
+    return [{key: (a[key] + b[key]) / 2 for key in a} for a, b in zip(per_rep[0::2], per_rep[1::2])]
+
+def _controls(observations, model, service):
+    means = input_means(model, service)
+    return [[row[key] for key in CONTROL_METRICS] for row in observations], [means[key] for key in CONTROL_METRICS]
+
+def _intervals(per_rep, model, service, confidence, antithetic, control_variates):
+    observations = _observations(per_rep, antithetic)
+    if control_variates:
+        controls, means = _controls(observations, model, service)
+        return {name: control_variate_interval([row[name] for row in observations], controls, means, confidence)
+                for name in REPLICATION_METRICS}
+    return {name: confidence_interval([row[name] for row in observations], confidence)
+            for name in REPLICATION_METRICS}
+
+def _adjusted(per_rep, model, service, confidence, antithetic, control_variates):
+    # Per-observation values behind _intervals: pair averages and/or y - beta (x - E[x]) on the
+    # fitted control-variate coefficients, so two runs can be differenced observation by observation
+    observations = _observations(per_rep, antithetic)
+    values = {name: np.array([row[name] for row in observations], dtype=float) for name in REPLICATION_METRICS}
+    if control_variates:
+        controls, means = _controls(observations, model, service)
+        centered = np.asarray(controls, dtype=float) - np.asarray(means, dtype=float)
+        for name, y in values.items():
+            beta = control_variate_interval(y, controls, means, confidence).get("beta")
+            if beta is not None:
+                values[name] = y - centered @ np.asarray(beta)
+    return values
+
+def run_replications(model, service, replications, workers=None, confidence=0.95, seed=None, run_length=None,
+                     progress=None, cancel=None, antithetic=False, control_variates=False):
+    # progress(done, total) is called as replications finish; cancel is a CancelToken checked
+    # between them (queued chunks are dropped, running ones finish)
+    # antithetic: replications run as pairs on one seed, the second mirroring every input draw;
+    #   each pair average is one observation (same CPU budget, half the observations)
+    # control_variates: adjust every metric on the mean sampled service and inter-arrival times
+    if replications < 1: raise ValueError("replications must be at least 1.")
+    if antithetic and replications % 2:
+        raise ValueError("Antithetic replications come in pairs; use an even number.")
+    if control_variates and not fixed_customer_count(run_length): raise ValueError(CONTROL_RUN_LENGTH_ERROR)
+    if seed is None:
+        seed = new_seed()
+    tasks = _tasks(model, service, run_length, seed, 0, replications, antithetic)
+    workers = min(workers or os.cpu_count() or 1, replications)
+    with _pool(workers) as pool:
+        per_rep = _execute(tasks, pool, workers, progress=progress, cancel=cancel)
+    return {"replications": per_rep,
+            "intervals": _intervals(per_rep, model, service, confidence, antithetic, control_variates),
+            "confidence": confidence, "seed": seed, "workers": workers, "antithetic": antithetic,
+            "control_variates": control_variates}
+
+def compare_replications(model_a, service_a, model_b, service_b, replications, crn=True, seed=None, **options):
+    # Paired comparison B - A. With common random numbers both configurations replay the same
+    # input streams replication by replication, so the noise they share cancels in the difference;
+    # without, B draws from the independent entropy (seed, 1).
+    # options are passed on to run_replications (workers, confidence, run_length, progress, cancel,
+    # antithetic, control_variates); the difference is taken on the same observations the
+    # per-configuration intervals use (pair averages, control-variate adjusted values), with the
+    # fitted coefficients treated as known
+    if seed is None:
+        seed = new_seed()
+    progress = options.pop("progress", None)
+    confidence = options.get("confidence", 0.95)
+    antithetic = options.get("antithetic", False)
+    control_variates = options.get("control_variates", False)
+    configs = [(model_a, service_a), (model_b, service_b)]
+    runs, samples = [], []
+    for k, (model, service) in enumerate(configs):
+        step = (lambda done, total, k=k: progress(k * total + done, 2 * total)) if progress else None
+        runs.append(run_replications(model, service, replications, seed=seed if crn or k == 0 else [seed, 1],
+                                     progress=step, **options))
+        samples.append(_adjusted(runs[k]["replications"], model, service, confidence, antithetic, control_variates))
+    intervals, variance_reduction = {}, {}
+    for name in REPLICATION_METRICS:
+        a, b = samples[0][name], samples[1][name]
+        intervals[name] = confidence_interval(b - a, confidence)
+        # Variance of the paired difference against two independent runs (var A + var B),
+        # all three on the same observations
+        var_a, var_b = confidence_interval(a)["std"] ** 2, confidence_interval(b)["std"] ** 2
+        var_d = intervals[name]["std"] ** 2
+        variance_reduction[name] = (var_a + var_b) / var_d if var_d > 0 else float("inf")
+    return {"a": runs[0], "b": runs[1], "intervals": intervals, "variance_reduction": variance_reduction,
+            "crn": crn, "seed": seed, "confidence": confidence}
+
+# ---------- SEQUENTIAL STOPPING ----------
+ANALYTIC_MODELS = {"MM1": "M/M/1", "MMS": "M/M/s", "MG1": "M/G/1", "MGS": "M/G/s"}
+
+def analytic_reference(model, service):
+    # Closed-form steady-state values as a sanity check, at the exact means and variances of the
+    # inputs the simulator samples (input_means / input_variances): the matching model, and the
+    # G/G approximation. Inter-arrivals come from the Poisson table (variance about λ, not λ²) and
+    # service times are rounded to whole units, so the G/G line is usually the closer one; neither
+    # is the exact mean of the simulated system.
+    means, variances = input_means(model, service), input_variances(model, service)
+    ma, va = means["Avg Inter Arrival"], variances["Avg Inter Arrival"]
+    ms, vs = means["Avg Service"], variances["Avg Service"]
+    lmbd = 1 / ma
+    if model.model == "MM1":
+        matching = compute_mm1(lmbd, 1 / ms)
+    elif model.model == "MMS":
+        matching = compute_mms(lmbd, 1 / ms, model.s)
+    elif model.model == "MG1":
+        matching = compute_mg1(lmbd, ms, vs)
+    else:
+        matching = compute_mgs(lmbd, ms, vs, model.s)
+    if model.model in ("MM1", "MG1"):
+        approximation = ("G/G/1", compute_gg1(lmbd, ma, va, ms, vs))
+    else:
+        approximation = ("G/G/s", compute_ggs(lmbd, ma, va, ms, vs, model.s))
+    return {ANALYTIC_MODELS.get(model.model, model.model): matching, approximation[0]: approximation[1]}
+
+def relative_half_width(ci):
+    if ci["half_width"] == 0: return 0.0
+    return ci["half_width"] / abs(ci["mean"]) if ci["mean"] else float("inf")
+
+def run_until_precision(model, service, metric="Wq", target=0.02, confidence=0.95, initial=10, max_replications=1000,
+                        max_seconds=None, workers=None, seed=None, run_length=None, progress=None, cancel=None,
+                        antithetic=False, control_variates=False):
+    # Sequential stopping: run `initial` replications, then add more until the half-width of
+    # `metric` is at most `target` times its mean, or max_replications / max_seconds (wall time)
+    # is used up. Each stage asks for the n (relative / target)^2 replications the current
+    # variance estimate predicts, at most doubling the study and fitting the time left.
+    # Replication r always runs on seed child r, so a study stopped at R replications has the
+    # numbers of run_replications(..., R, seed=seed). progress(done, total) counts towards the
+    # end of the current stage.
+    if metric not in REPLICATION_METRICS: raise ValueError(f"Unknown metric: {metric}")
+    if target <= 0: raise ValueError("target must be positive.")
+    if control_variates and not fixed_customer_count(run_length): raise ValueError(CONTROL_RUN_LENGTH_ERROR)
+    step = 2 if antithetic else 1
+    initial = max(initial, 2 * step)
+    initial += initial % step
+    max_replications -= max_replications % step
+    if max_replications < initial: raise ValueError(f"max_replications must be at least {initial}.")
+    if seed is None:
+        seed = new_seed()
+
+    workers = min(workers or os.cpu_count() or 1, max_replications)
+    started = time.perf_counter()
+    per_rep, history = [], []
+    planned = initial
+    with _pool(workers) as pool:
+        while True:
+            tasks = _tasks(model, service, run_length, seed, len(per_rep), planned - len(per_rep), antithetic)
+            per_rep += _execute(tasks, pool, workers, done=len(per_rep), total=planned, progress=progress,
+                                cancel=cancel)
+            intervals = _intervals(per_rep, model, service, confidence, antithetic, control_variates)
+            ci, n, elapsed = intervals[metric], len(per_rep), time.perf_counter() - started
+            relative = relative_half_width(ci)
+            history.append({"replications": n, "mean": ci["mean"], "half_width": ci["half_width"],
+                            "relative": relative, "seconds": elapsed})
+            if relative <= target:
+                stopped = "target"
+                break
+            if n >= max_replications:
+                stopped = "replications"
+                break
+            if max_seconds is not None and elapsed >= max_seconds:
+                stopped = "time"
+                break
+            predicted = math.ceil(n * (relative / target) ** 2) if math.isfinite(relative) else 2 * n
+            planned = min(max(predicted, n + max(step, workers)), 2 * n, max_replications)
+            if max_seconds is not None:
+                planned = min(planned, n + max(step, int((max_seconds - elapsed) / (elapsed / n))))
+            planned += planned % step
+
+    return {"replications": per_rep, "intervals": intervals, "confidence": confidence, "seed": seed,
+            "workers": workers, "antithetic": antithetic, "control_variates": control_variates,
+            "metric": metric, "target": target, "relative": relative, "met": stopped == "target",
+            "stopped": stopped, "history": history, "seconds": time.perf_counter() - started,
+            "analytic": analytic_reference(model, service)}
@@ -0,0 +1,239 @@
+import math
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+from matplotlib.ticker import MaxNLocator
+
+# Matplotlib figures for simulation results.
+
+GANTT_COLORS = np.array(["#BA68C8", "#FF8A65", "#FFD54F", "#4DB6AC", "#64B5F6", "#A1887F"])
+IDLE_COLOR = "#FFCDD2"
+DENSE_COLOR = "#9E9E9E"
+
+QUEUE_COLOR = "#863F93"
+BUSY_COLOR = "#900E40"
+MAX_BANDS = 40          # occupancy layers; larger server counts are grouped into bands
+
+# ---------- LEVEL OF DETAIL ----------
+def decimate_steps(times, values, t0, t1, buckets):
+    # Reduce a post-step series to at most `buckets` columns over [t0, t1], keeping each column's
+    # minimum and maximum so short spikes survive. Returns (x, lo, hi) with a closing point at t1;
+    # series that already fit come back exactly (lo is hi).
+    times, values = np.asarray(times), np.asarray(values)
+    first = max(np.searchsorted(times, t0, "right") - 1, 0)
+    stop = np.searchsorted(times, t1, "left")
+    if stop - first <= buckets:
+        x = np.r_[t0, times[first + 1:stop], t1]
+        v = np.r_[values[first:stop], values[stop - 1]] if stop > first else np.zeros(2)
+        return x, v, v
+
+    # Column k covers the step active at its left edge through the last step starting inside it;
+    # reduceat over (start, stop) pairs reduces each range, the sentinel keeps `stop` indexable
+    edges = np.linspace(t0, t1, buckets + 1)
+    starts = np.maximum(np.searchsorted(times, edges[:-1], "right") - 1, 0)
+    stops = np.searchsorted(times, edges[1:], "left")
+    pairs = np.ravel(np.column_stack((starts, stops)))
+    ext = np.append(values, 0)
+    lo = np.minimum.reduceat(ext, pairs)[::2]
+    hi = np.maximum.reduceat(ext, pairs)[::2]
+    return edges, np.r_[lo, lo[-1]], np.r_[hi, hi[-1]]
+
+def _time_axis(ax, x, exact, max_ticks=30):
+    # One tick per event only while that stays readable
+    if exact and len(x) <= max_ticks:
+        ax.set_xticks(x)
+        plt.setp(ax.get_xticklabels(), rotation=45, fontsize=8)
+    else:
+        ax.xaxis.set_major_locator(MaxNLocator(nbins=15))
+
+# ---------- Q(t) ----------
+def queue_figure(times, q_t, horizon, window=None, width=15, height=4, dpi=100):
+    t0, t1 = window or (0, horizon)
+    x, lo, hi = decimate_steps(times, q_t, t0, t1, int(width * dpi * 0.9))
+    exact = lo is hi
+
+    fig, ax = plt.subplots(figsize=(width, height), dpi=dpi)
+    ax.step(x, hi, where="post", color=QUEUE_COLOR, linewidth=1.5 if exact else 0.8)
+    if exact:
+        ax.fill_between(x, hi, step="post", facecolor="none", edgecolor=QUEUE_COLOR,
+                        hatch="xxx" if len(x) <= 200 else "", alpha=0.4)
+    else:
+        # Min/max envelope of each pixel column
+        ax.fill_between(x, lo, hi, step="post", color=QUEUE_COLOR, alpha=0.35, linewidth=0)
+
+    ax.set_xlabel("t (Time)")
+    ax.set_ylabel("Q(t)")
+    _time_axis(ax, x, exact)
+    ax.set_xlim(t0, t1)
+    ax.set_ylim(0, (hi.max() if len(hi) else 0) + 1)
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.grid(axis='y', linestyle='--', alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+# ---------- B(t) / OCCUPANCY ----------
+def busy_fractions(segments, num_servers, edges):
+    # Exact busy fraction of every server in every [edges[k], edges[k+1]) from its segments.
+    # A server's segments never overlap and are sorted by start, so its cumulative busy time at x
+    # is the durations of segments started by x minus the unfinished part of the last one.
+    server, start, end = segments["server"], segments["start"], segments["end"]
+    bounds = np.searchsorted(server, np.arange(1, num_servers + 2))
+    busy = np.zeros((num_servers, len(edges)))
+    for j in range(num_servers):
+        st_j, en_j = start[bounds[j]:bounds[j + 1]], end[bounds[j]:bounds[j + 1]]
+        if not len(st_j): continue
+        done = np.r_[0, np.cumsum(en_j - st_j)]
+        i = np.searchsorted(st_j, edges, "right")
+        unfinished = np.where(i > 0, np.maximum(en_j[np.maximum(i - 1, 0)] - edges, 0), 0)
+        busy[j] = done[i] - unfinished
+    return np.diff(busy, axis=1) / np.diff(edges)
+
+def busy_count_series(segments):
+    # Number of busy servers as a step series; at a hand-over instant the -1 sorts before the +1
+    t = np.concatenate((segments["start"], segments["end"]))
+    delta = np.r_[np.ones(len(segments["start"]), dtype=np.int64), -np.ones(len(segments["end"]), dtype=np.int64)]
+    order = np.lexsort((delta, t))
+    t, count = t[order], np.cumsum(delta[order])
+    last = np.r_[t[1:] != t[:-1], True]
+    return np.r_[0.0, t[last]], np.r_[0, count[last]]
+
+def occupancy_figure(segments, num_servers, horizon, window=None, width=15, height=4, dpi=100, columns=600):
+    # Stacked per-server occupancy (time-averaged per column, so the stack height is the mean
+    # number of busy servers) with the exact peak busy count of each column on top
+    t0, t1 = window or (0, horizon)
+    if t1 <= t0: t1 = t0 + 1.0
+    edges = np.linspace(t0, t1, columns + 1)
+    fractions = busy_fractions(segments, num_servers, edges)
+    bands = np.array_split(np.arange(num_servers), min(num_servers, MAX_BANDS))
+    layers = [fractions[band].sum(axis=0) for band in bands]
+
+    fig, ax = plt.subplots(figsize=(width, height), dpi=dpi)
+    base = np.zeros(columns + 1)
+    for k, (band, layer) in enumerate(zip(bands, layers)):
+        top = base + np.r_[layer, layer[-1]]
+        label = f"Server {band[0] + 1}" if len(band) == 1 else f"Servers {band[0] + 1}–{band[-1] + 1}"
+        ax.fill_between(edges, base, top, step="post", color=GANTT_COLORS[k % len(GANTT_COLORS)],
+                        linewidth=0, label=label)
+        base = top
+
+    times, count = busy_count_series(segments)
+    x, _, peak = decimate_steps(times, count, t0, t1, columns)
+    ax.step(x, peak, where="post", color=BUSY_COLOR, linewidth=1, label="Peak busy servers")
+
+    ax.set_xlim(t0, t1)
+    ax.set_ylim(0, num_servers + 0.2)
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.set_xlabel("t (Time)")
+    ax.set_ylabel("Busy servers")
+    ax.xaxis.set_major_locator(MaxNLocator(nbins=15))
+    if num_servers <= 10:
+        ax.legend(loc="upper left", bbox_to_anchor=(1.0, 1.0), fontsize=8, frameon=False)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    plt.tight_layout()
+    return fig
+
+# ---------- GANTT ----------
+def gantt_segments(gantt):
+    # Segment log (SEGMENT_DTYPE columns) re-sorted by (server, start); back-to-back pieces of
+    # the same job on the same server are merged into one bar
+    segs = gantt[np.lexsort((gantt["start"], gantt["server"]))]
+    n = len(segs)
+    if not n:
+        return segs
+    new_bar = np.ones(n, dtype=bool)
+    new_bar[1:] = ((segs["server"][1:] != segs["server"][:-1]) | (segs["cust"][1:] != segs["cust"][:-1])
+                   | (segs["start"][1:] != segs["end"][:-1]))
+    first = np.flatnonzero(new_bar)
+    last = np.append(first[1:] - 1, n - 1)
+    merged = segs[first]
+    merged["end"] = segs["end"][last]
+    return merged
+
+def _bars(server, start, end, height=0.8):
+    # Rectangles as one (n, 4, 2) vertex array for a single PolyCollection
+    y0, y1 = server - height / 2, server + height / 2
+    return np.stack([np.stack([start, y0], 1), np.stack([start, y1], 1),
+                     np.stack([end, y1], 1), np.stack([end, y0], 1)], 1)
+
+def gantt_figure(segments, num_servers, horizon, window=None, width=15, dpi=100,
+                 min_px=2, label_px=36, max_labels=300, max_ticks=30):
+    # All servers in one figure. Bars narrower than min_px at the current zoom are aggregated
+    # per server into grey "busy" runs, labels go on bars at least label_px wide
+    # (widest first, at most max_labels) and exact boundary ticks are only used when few are visible.
+    t0, t1 = window or (0, horizon)
+    span = (t1 - t0) or 1.0
+    px_per_time = width * dpi * (1 - 1.2 / width) / span
+
+    start, end = segments["start"], segments["end"]
+    visible = (end > t0) & (start < t1)
+    cust, server = segments["cust"][visible], segments["server"][visible]
+    start, end = np.maximum(start[visible], t0), np.minimum(end[visible], t1)
+
+    px = (end - start) * px_per_time
+    wide = px >= min_px
+    tiny = ~wide
+
+    # Tiny bars are unioned per server wherever they overlap or sit less than min_px apart.
+    # Segments are sorted by (server, start); shifting each server onto its own stretch of the
+    # time axis lets one running maximum of the end times cover all servers at once.
+    t_server, t_start, t_end = server[tiny], start[tiny], end[tiny]
+    if len(t_start):
+        shift = t_server * 3 * span
+        reach = np.maximum.accumulate(t_end + shift)
+        first = np.flatnonzero(np.r_[True, t_start[1:] + shift[1:] > reach[:-1] + min_px / px_per_time])
+        t_server, t_start, t_end = t_server[first], t_start[first], np.maximum.reduceat(t_end, first)
+
+    # Fixed margins instead of tight_layout, which would draw every collection an extra time
+    row_h = max(0.12, min(0.6, 10 / num_servers))
+    height = 1.4 + num_servers * row_h
+    fig, ax = plt.subplots(figsize=(width, height), dpi=dpi)
+    fig.subplots_adjust(left=1.0 / width, right=1 - 0.2 / width, bottom=0.75 / height, top=1 - 0.2 / height)
+    rows = np.arange(1, num_servers + 1)
+
+    # Idle background: one bar per server instead of one per gap (hatching is costly to
+    # rasterize, so only small server counts get it)
+    ax.barh(rows, span, left=t0, height=0.8, color=IDLE_COLOR, edgecolor="#E57373",
+            hatch="///" if num_servers <= 10 else "", linewidth=0)
+
+    n_bars = int(wide.sum()) + len(t_start)
+    edge = 0.5 if n_bars <= 2000 else 0
+    if wide.any():
+        ax.add_collection(PolyCollection(_bars(server[wide], start[wide], end[wide]),
+                                         facecolors=GANTT_COLORS[cust[wide] % len(GANTT_COLORS)],
+                                         edgecolors="black", linewidths=edge))
+    if len(t_start):
+        ax.add_collection(PolyCollection(_bars(t_server, t_start, t_end), facecolors=DENSE_COLOR, linewidths=0))
+
+    # Labels only where they fit, and only when the row is tall enough to hold text
+    labels = np.flatnonzero(wide & (px >= label_px))
+    if len(labels) > max_labels:
+        labels = labels[np.argsort(-px[labels], kind="stable")[:max_labels]]
+    if row_h * dpi < 14:
+        labels = labels[:0]
+    fontsize = 11 if row_h >= 0.5 else 8
+    for k in labels:
+        ax.text((start[k] + end[k]) / 2, server[k], f"C{cust[k]}", ha="center", va="center",
+                fontsize=fontsize, fontweight="bold", color="white", clip_on=True)
+
+    # Exact segment boundaries as ticks when zoomed in far enough, a regular locator otherwise
+    boundaries = np.unique(np.concatenate(([t0, t1], start[wide], end[wide])))
+    if len(boundaries) <= max_ticks:
+        ax.set_xticks(boundaries)
+        plt.setp(ax.get_xticklabels(), rotation=45)
+    else:
+        ax.xaxis.set_major_locator(MaxNLocator(nbins=15))
+
+    step = max(1, math.ceil(num_servers / 30))
+    ax.set_yticks(rows[::step])
+    ax.set_yticklabels([f"Server {j}" for j in rows[::step]])
+    ax.set_xlim(t0, t1)
+    ax.set_ylim(num_servers + 0.6, 0.4)
+    ax.set_xlabel("Time")
+    for spine in ["top", "right", "left"]: ax.spines[spine].set_visible(False)
+
+    info = {"segments": len(segments["start"]), "visible": int(visible.sum()), "bars": int(wide.sum()),
+            "aggregated": int(tiny.sum()), "dense_runs": len(t_start), "labels": len(labels)}
+    return fig, info
@@ -0,0 +1,136 @@
+import math
+
+# Output-analysis helpers for the simulation engine (pure Python, no scipy needed).
+
+# ---------- STUDENT-T DISTRIBUTION ----------
+def _betacf(a, b, x):
+    # Continued fraction for the incomplete beta function (modified Lentz)
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1, a - 1
+    c, d = 1.0, 1 - qab * x / qap
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1 + aa * d
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = 1 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1 + aa * d
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = 1 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 3e-16:
+            break
+    return h
+
+def _betai(a, b, x):
+    # Regularized incomplete beta I_x(a, b)
+    if x <= 0: return 0.0
+    if x >= 1: return 1.0
+    bt = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1) / (a + b + 2):
+        return bt * _betacf(a, b, x) / a
+    return 1 - bt * _betacf(b, a, 1 - x) / b
+
+def student_t_cdf(t, df):
+    tail = 0.5 * _betai(df / 2, 0.5, df / (df + t * t))
+    return 1 - tail if t > 0 else tail
+
+def student_t_ppf(q, df):
+    if not 0 < q < 1: raise ValueError("q must be in (0, 1).")
+    if q < 0.5: return -student_t_ppf(1 - q, df)
+    hi = 1.0
+    while student_t_cdf(hi, df) < q:
+        hi *= 2
+    lo = 0.0
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if student_t_cdf(mid, df) < q: lo = mid
+        else: hi = mid
+    return (lo + hi) / 2
+
+# ---------- CONFIDENCE INTERVALS ----------
+def confidence_interval(values, confidence=0.95):
+    values = list(values)
+    n = len(values)
+    mean = sum(values) / n if n else float("nan")
+    if n < 2:
+        return {"mean": mean, "std": float("nan"), "half_width": float("nan"),
+                "low": float("nan"), "high": float("nan"), "n": n}
+    var = sum((v - mean) ** 2 for v in values) / (n - 1)
+    std = math.sqrt(var)
+    half = student_t_ppf(0.5 + confidence / 2, n - 1) * std / math.sqrt(n)
+    return {"mean": mean, "std": std, "half_width": half, "low": mean - half, "high": mean + half, "n": n}
+
+# ---------- ONLINE ACCUMULATORS ----------
+class RunningStats:
+    # Welford's online mean / variance: O(1) memory however many observations are added
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+    @property
+    def std(self):
+        return math.sqrt(self.var) if self.n > 1 else float("nan")
+
+# ---------- STEADY STATE (SINGLE LONG RUN) ----------
+def mser(values, batch=5):
+    # MSER-m warm-up truncation: average the output in batches of `batch` and drop the first d
+    # batches that minimize the squared standard error of the remaining mean,
+    # sum_{j>d} (Z_j - mean_d)^2 / (k - d)^2. d is searched over the first half of the run only;
+    # a minimum on that limit means no steady state was reached and the run should be longer.
+    values = list(values)
+    k = len(values) // batch
+    if k < 2:
+        return {"truncate": 0, "statistic": float("nan"), "at_limit": True}
+    z = [sum(values[i * batch:(i + 1) * batch]) / batch for i in range(k)]
+    limit = k // 2
+    s1 = s2 = 0.0
+    best, best_d = float("inf"), 0
+    for d in range(k - 1, -1, -1):   # suffix sums from the end of the run backwards
+        s1 += z[d]
+        s2 += z[d] * z[d]
+        if d <= limit:
+            n = k - d
+            stat = max(s2 - s1 * s1 / n, 0.0) / (n * n)
+            if stat <= best:
+                best, best_d = stat, d
+    return {"truncate": best_d * batch, "statistic": best, "at_limit": best_d == limit}
+
+def batch_means(values, batches=20, confidence=0.95):
+    # Confidence interval from one long (warm-up free) run: split it into `batches` contiguous
+    # batches (any remainder is dropped from the start) and treat the batch means as independent.
+    # A large lag-1 autocorrelation of the batch means says the batches are too short for that.
+    values = list(values)
+    size = len(values) // batches
+    if size < 1:
+        return dict(confidence_interval([], confidence), batch_size=0, lag1=float("nan"))
+    values = values[len(values) - size * batches:]
+    means = [sum(values[i * size:(i + 1) * size]) / size for i in range(batches)]
+    return dict(confidence_interval(means, confidence), batch_size=size, lag1=lag1_autocorrelation(means))
+
+def lag1_autocorrelation(values):
+    values = list(values)
+    n = len(values)
+    if n < 3: return float("nan")
+    mean = sum(values) / n
+    den = sum((v - mean) ** 2 for v in values)
+    if den == 0: return 0.0
+    return sum((values[i] - mean) * (values[i + 1] - mean) for i in range(n - 1)) / den
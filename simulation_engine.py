@@ -0,0 +1,775 @@
+import math, heapq, threading, time, tracemalloc
+from contextlib import contextmanager, nullcontext
+from array import array
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+from sim_stats import RunningStats, confidence_interval, mser, batch_means, lag1_autocorrelation
+
+# Headless simulation engine: no streamlit / matplotlib imports so it can be driven
+# from the UI, from batch_runner.py or from any script.
+
+MM_MODELS = ["MM1", "MMS"]
+MG_MODELS = ["MG1", "MGS"]
+
+# ---------- CONFIG OBJECTS ----------
+@dataclass
+class ModelConfig:
+    model: str = "MM1"          # MM1 / MMS / MG1 / MGS
+    lmbd: float = 2.0
+    s: int = 1
+    with_priority: bool = False
+    preemption: bool = False
+    priority_classes: int = 3   # priorities 1 (highest) .. priority_classes
+
+@dataclass
+class ServiceDistribution:
+    kind: str = "exponential"   # exponential / normal / uniform
+    mu: float = None
+    sigma: float = None
+    a: float = None
+    b: float = None
+
+def service_for_model(model, service_dist=None, mu=None, sigma=None, a=None, b=None):
+    # M/M models always use exponential service, M/G models use the chosen distribution
+    kind = "exponential" if model in MM_MODELS else service_dist
+    return ServiceDistribution(kind, mu, sigma, a, b)
+
+# ---------- POISSON PROBABILITY FUNCTION ----------
+def poisson_probs(lam):
+    probs, cum = [], []
+    i, total = 0, 0.0
+
+    while True:
+        p = math.exp(-lam) * (lam ** i) / math.factorial(i)
+        total += p
+
+        rounded_p = round(p, 5)
+        rounded_cp = round(total, 5)
+
+        if rounded_cp >= 0.99999:
+            probs.append(rounded_p)
+            cum.append(1.00000)
+            break
+
+        probs.append(rounded_p)
+        cum.append(rounded_cp)
+        i += 1
+
+        # Safe break
+        if i > 50: break
+
+    return probs, cum
+
+# ---------- Utilization and queue length Graphs ----------
+def step_counts(times, plus, minus, groups=None, num_groups=1):
+    # Sweep over +1/-1 events: value on [times[k], times[k+1]) = #(plus <= times[k]) - #(minus <= times[k]).
+    # Events are binned to the first sample time at or after them, then one cumulative sum per group.
+    T = len(times)
+    plus_idx = np.searchsorted(times, plus, side="left")
+    minus_idx = np.searchsorted(times, minus, side="left")
+    if groups is not None:
+        plus_idx = plus_idx + groups * (T + 1)
+        minus_idx = minus_idx + groups * (T + 1)
+    size = num_groups * (T + 1)
+    delta = np.bincount(plus_idx, minlength=size) - np.bincount(minus_idx, minlength=size)
+    return np.cumsum(delta.reshape(num_groups, T + 1), axis=1)[:, :T]
+
+def event_queue_series(arrivals, ends, seg_starts, seg_ends, max_time):
+    # Q(t) alone: customers in the system but not in service, so a preempted job waiting to resume
+    # is queued as in the engine's Lq (area under len(waiting)). +1 at each arrival and segment end,
+    # -1 at each departure and segment start, over every event time.
+    times = np.unique(np.concatenate((arrivals, ends, seg_starts, seg_ends, [0, max_time])))
+    return times, step_counts(times, np.concatenate((arrivals, seg_ends)), np.concatenate((ends, seg_starts)))[0]
+
+def queue_series(df, gantt, max_time):
+    return event_queue_series(df['Arrival Time'].to_numpy(), df['End Time'].to_numpy(),
+                              gantt["start"], gantt["end"], max_time)
+
+def get_time_series_data(df, max_time, num_servers, gantt):
+    times, queue_length = queue_series(df, gantt, max_time)
+
+    # B_j(t): +1 / -1 at the start / end of every Gantt segment, one sweep for all servers
+    busy = step_counts(times, gantt["start"], gantt["end"], groups=gantt["server"].astype(np.int64) - 1,
+                       num_groups=num_servers)
+    server_status = {s_id: (busy[s_id - 1] > 0).astype(np.int64) for s_id in range(1, num_servers + 1)}
+
+    return times, queue_length, server_status
+
+# ---------- SERVER UTILIZATION ----------
+def server_table(busy_time, busy_periods, longest_idle, horizon):
+    return {
+        j + 1: {
+            "Busy Time": busy_time[j],
+            "Idle Time": horizon - busy_time[j],
+            "Utilization": busy_time[j] / horizon if horizon > 0 else 0.0,
+            "Busy Periods": busy_periods[j],
+            "Longest Idle": longest_idle[j],
+        }
+        for j in range(len(busy_time))
+    }
+
+def server_utilization(gantt, num_servers, horizon=None):
+    # Exact per-server busy time, number of busy periods and longest idle gap from the
+    # Gantt segments (no sampled time grid). Idle gaps include the lead-in from t = 0 and
+    # the tail up to the horizon (default: last segment end).
+    server = gantt["server"].astype(np.int64) - 1
+    start, end = gantt["start"], gantt["end"]
+    if horizon is None:
+        horizon = end.max() if len(end) else 0
+
+    busy_time = np.bincount(server, weights=end - start, minlength=num_servers)
+
+    # Walk each server's segments in time order: a gap before a segment starts a new busy period
+    order = np.lexsort((start, server))
+    server, start, end = server[order], start[order], end[order]
+    first = np.ones(len(server), dtype=bool)
+    first[1:] = server[1:] != server[:-1]
+    prev_end = np.where(first, 0.0, np.roll(end, 1))
+    gap = start - prev_end
+    new_period = first | (gap > 0)
+
+    busy_periods = np.bincount(server, weights=new_period, minlength=num_servers).astype(np.int64)
+    longest_idle = np.zeros(num_servers)
+    np.maximum.at(longest_idle, server, gap)
+    last_end = np.zeros(num_servers)
+    np.maximum.at(last_end, server, end)
+    longest_idle = np.maximum(longest_idle, horizon - last_end)
+
+    return server_table(busy_time.tolist(), busy_periods.tolist(), longest_idle.tolist(), horizon)
+
+# ---------- STEADY STATE ----------
+def busy_time_at(segments, times):
+    # Busy time of all servers together over [0, t] for every t: started segments contribute
+    # t - start, finished ones give back t - end
+    start, end = np.sort(segments["start"]), np.sort(segments["end"])
+    times = np.asarray(times, dtype=float)
+    i, j = np.searchsorted(start, times, "right"), np.searchsorted(end, times, "right")
+    return (i * times - np.r_[0.0, np.cumsum(start)][i]) - (j * times - np.r_[0.0, np.cumsum(end)][j])
+
+def steady_state(df, gantt, num_servers, batches=20, confidence=0.95):
+    # Steady-state Wq, W and utilization from one long run: MSER-5 picks the warm-up on the
+    # waiting times in arrival order, then batch means over the rest give the intervals.
+    # Utilization is batched over equal time windows from the end of the warm-up (arrival of
+    # the first retained customer) to the last completion.
+    df = df.sort_values("     ID")
+    waits = df["Waiting Time"].to_numpy(dtype=float).tolist()
+    tats = df["Turnaround Time"].to_numpy(dtype=float).tolist()
+    warm = mser(waits)
+    d = warm["truncate"]
+    if len(waits) - d < 2 * batches:
+        return {"error": f"Too few customers after the warm-up for {batches} batches; run longer."}
+
+    t0, t1 = float(df["Arrival Time"].iloc[d]), float(df["End Time"].max())
+    edges = np.linspace(t0, t1, batches + 1)
+    util = (np.diff(busy_time_at(gantt, edges)) / (np.diff(edges) * num_servers)).tolist()
+    return {
+        "Warm-up Customers": d, "Warm-up Time": t0, "Warm-up At Limit": warm["at_limit"], "Batches": batches,
+        "intervals": {
+            "Wq": batch_means(waits[d:], batches, confidence),
+            "W": batch_means(tats[d:], batches, confidence),
+            "Utilization": dict(confidence_interval(util, confidence), batch_size=(t1 - t0) / batches,
+                                lag1=lag1_autocorrelation(util)),
+        },
+    }
+
+# ---------- VALIDATION ----------
+def validate_inputs(model, service):
+    errors = []
+
+    # Arrival rate
+    if model.lmbd is None or model.lmbd <= 0:
+        errors.append("λ (Arrival Rate) cannot be zero or negative.")
+
+    # Servers
+    if model.s is None or model.s <= 0:
+        errors.append("Number of servers (s) must be at least 1.")
+
+    if model.with_priority and (model.priority_classes is None or model.priority_classes < 1):
+        errors.append("Number of priority classes must be at least 1.")
+
+    # Exponential service (MM models)
+    if service.kind == "exponential":
+        if service.mu is None or service.mu <= 0:
+            errors.append("μ (Service Rate) cannot be zero or negative.")
+
+    if service.kind == "normal":
+        if service.mu is None or service.mu <= 0:
+            errors.append("μ (Mean Service Time) cannot be zero or negative.")
+        if service.sigma is None or service.sigma <= 0:
+            errors.append("σ (Standard Deviation) cannot be zero or negative.")
+
+    if service.kind == "uniform":
+        if service.a is None or service.a <= 0:
+            errors.append("a (Minimum Service Time) cannot be zero or negative.")
+        if service.b is None or service.b <= 0:
+            errors.append("b (Maximum Service Time) cannot be zero or negative.")
+        if service.a is not None and service.b is not None and service.b <= service.a:
+            errors.append("b (Maximum Service Time) must be greater than a (Minimum Service Time).")
+
+    if service.kind not in ["exponential", "normal", "uniform"]:
+        errors.append(f"Unknown service distribution: {service.kind}.")
+
+    return errors
+
+def traffic_intensity(model, service):
+    if service.kind == "uniform":
+        return model.lmbd / (model.s * (service.a + service.b) / 2)
+    return model.lmbd / (service.mu * model.s)
+
+# ---------- RUN LENGTH ----------
+@dataclass
+class RunLength:
+    customers: int = None       # admit the first N arrivals, then drain the system
+    horizon: float = None       # admit arrivals up to time T, then drain the system
+    completions: int = None     # stop as soon as X customers have completed service
+
+    def is_default(self):
+        return self.customers is None and self.horizon is None and self.completions is None
+
+def validate_run_length(run_length):
+    errors = []
+    if run_length.customers is not None and run_length.customers < 1:
+        errors.append("Number of customers (N) must be at least 1.")
+    if run_length.horizon is not None and run_length.horizon < 0:
+        errors.append("Time horizon (T) cannot be negative.")
+    if run_length.completions is not None and run_length.completions < 1:
+        errors.append("Number of completions (X) must be at least 1.")
+    return errors
+
+# ---------- PROGRESS / CANCELLATION ----------
+PROGRESS_EVERY = 4096   # events between progress callbacks and cancel checks
+
+class SimulationCancelled(Exception):
+    pass
+
+class CancelToken:
+    # Cooperative cancellation: any thread (e.g. a UI callback) calls cancel(); the engine
+    # notices at its next progress checkpoint and raises SimulationCancelled
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+def progress_record(events, customers, completed, sim_time, elapsed, max_customers, horizon, max_completions):
+    # Fraction done is that of whichever stopping rule is closest to firing
+    fraction = max(customers / max_customers if max_customers else 0,
+                   sim_time / horizon if horizon else 0,
+                   completed / max_completions if max_completions else 0)
+    fraction = min(fraction, 1.0)
+    eta = elapsed * (1 - fraction) / fraction if fraction > 0 else None
+    return {"events": events, "customers": customers, "completed": completed, "sim_time": sim_time,
+            "fraction": fraction, "elapsed": elapsed, "eta": eta}
+
+# ---------- INSTRUMENTATION ----------
+class Profiler:
+    # Opt-in per-stage instrumentation. `with profiler.stage(name, count):` (or begin(name) ...
+    # end(count)) records the stage's wall time and a work count (events, rows, points ...); with
+    # memory=True also its tracemalloc peak above the memory in use when it started (tracing is
+    # started on first use and stopped by close()). Stages nest: self_seconds excludes time spent in
+    # inner stages. Repeated stages accumulate.
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.stages = {}
+        self._stack = []        # open stages: [name, start, base memory, highest peak seen, child time]
+        self._owns_tracing = False
+
+    def begin(self, name):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1][3] = max(self._stack[-1][3], peak)
+            tracemalloc.reset_peak()
+        else:
+            current = 0
+        self._stack.append([name, time.perf_counter(), current, current, 0.0])
+
+    def end(self, count=None):
+        # Closes the innermost open stage; count is its work count, if known only now
+        name, started, base, seen, child = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        record = self.stages.setdefault(name, {"stage": name, "calls": 0, "seconds": 0.0, "self_seconds": 0.0,
+                                               "count": None, "peak_mb": None})
+        record["calls"] += 1
+        record["seconds"] += elapsed
+        record["self_seconds"] += elapsed - child
+        if count is not None:
+            record["count"] = (record["count"] or 0) + count
+        if self.memory:
+            peak = max(tracemalloc.get_traced_memory()[1], seen)
+            record["peak_mb"] = max(record["peak_mb"] or 0.0, (peak - base) / 1e6)
+        if self._stack:
+            self._stack[-1][4] += elapsed
+            if self.memory:
+                self._stack[-1][3] = max(self._stack[-1][3], peak)
+
+    @contextmanager
+    def stage(self, name, count=None):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(count)
+
+    def records(self):
+        # One dict per stage, in first-run order, with throughput where a count was recorded
+        return [dict(r, per_second=r["count"] / r["self_seconds"] if r["count"] and r["self_seconds"] > 0 else None)
+                for r in self.stages.values()]
+
+    def close(self):
+        # Stops tracing; stages recorded afterwards are timed only
+        self.memory = False
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+def profile_stage(profiler, name, count=None):
+    # profiler.stage(...) or a no-op when instrumentation is off
+    return nullcontext() if profiler is None else profiler.stage(name, count)
+
+# ---------- RECORD LOGS ----------
+SERVED, PREEMPTED = 0, 1    # how a service segment ended
+SEGMENT_DTYPE = np.dtype([("cust", np.int64), ("server", np.int32), ("start", np.float64),
+                          ("end", np.float64), ("kind", np.int8)])
+CUSTOMER_DTYPE = np.dtype([("id", np.int64), ("inter_arrival", np.float64), ("arrival", np.float64),
+                           ("service", np.float64), ("priority", np.int16), ("start", np.float64),
+                           ("end", np.float64), ("server", np.int32)])
+TRACE_CHUNK = 65536         # records per chunk handed to a trace writer
+
+class RecordLog:
+    # Columnar log in typed, growable `array` buffers (one per field of a structured dtype;
+    # 29 bytes per service segment). to_numpy() hands the columns over as one structured array.
+    __slots__ = ("dtype", "columns")
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.columns = {name: array(dtype[name].char) for name in dtype.names}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def appenders(self):
+        return [self.columns[name].append for name in self.dtype.names]
+
+    def to_numpy(self):
+        out = np.empty(len(self), dtype=self.dtype)
+        if len(self):
+            for name, col in self.columns.items():
+                out[name] = np.frombuffer(col, dtype=self.dtype[name])
+        return out
+
+    def clear(self):
+        for col in self.columns.values():
+            del col[:]
+
+# ---------- SIMULATION FUNCTION ----------
+COMPLETION, ARRIVAL = 0, 1
+SAMPLE_CHUNK = 65536
+
+INPUT_PROCESSES = ["arrival", "service", "priority"]
+
+def new_seed():
+    # Fresh OS entropy as a plain int: pass it back as rng / seed to replay the run or study.
+    # 53 bits, so it can be typed back into a UI number field exactly.
+    return int(np.random.SeedSequence().generate_state(1, np.uint64)[0] >> 11)
+
+def input_streams(rng):
+    # One child generator per input process. Runs started from the same seed see the same
+    # inter-arrival, service and priority draws whatever the other processes consume
+    # (common random numbers across configurations). Seeds are not consumed: the children are
+    # keyed on the seed's spawn_key, so one SeedSequence always gives the same streams (antithetic
+    # partners share theirs). A Generator is spawned from, which advances it.
+    if isinstance(rng, np.random.Generator):
+        return dict(zip(INPUT_PROCESSES, rng.spawn(len(INPUT_PROCESSES))))
+    seq = rng if isinstance(rng, np.random.SeedSequence) else np.random.SeedSequence(rng)
+    return {name: np.random.default_rng(np.random.SeedSequence(seq.entropy, spawn_key=seq.spawn_key + (i,),
+                                                               pool_size=seq.pool_size))
+            for i, name in enumerate(INPUT_PROCESSES)}
+
+def _uniforms(rng, n, antithetic):
+    u = rng.random(n)
+    return 1 - u if antithetic else u
+
+def sample_inputs(n, cum, service, with_priority, streams, classes=3, antithetic=False):
+    # Whole arrays in one go, all by inverse transform so that antithetic runs (u -> 1 - u,
+    # z -> -z for normal service) mirror every draw: inter-arrivals by table lookup on uniforms,
+    # services exponential / uniform / normal (rounded, at least 1 time unit), priorities 1..classes
+    cum = np.asarray(cum, dtype=float)
+    lookup = np.searchsorted(cum, _uniforms(streams["arrival"], n, antithetic), side="right")
+    inter_arrival = np.minimum(lookup, len(cum) - 1)
+
+    # ---------- MM MODELS ----------
+    if service.kind == "exponential":
+        u = _uniforms(streams["service"], n, antithetic)
+        raw = -service.mu * np.log1p(-np.minimum(u, 1 - 2 ** -53))
+
+    # ---------- MG MODELS ----------
+    elif service.kind == "uniform":
+        raw = service.a + (service.b - service.a) * _uniforms(streams["service"], n, antithetic)
+    else:
+        z = streams["service"].standard_normal(n)
+        raw = service.mu + service.sigma * (-z if antithetic else z)
+
+    service_times = np.maximum(1, np.rint(raw)).astype(np.int64)
+    if with_priority:
+        u = _uniforms(streams["priority"], n, antithetic)
+        priority = np.minimum((u * classes).astype(np.int64), classes - 1) + 1
+    else:
+        priority = np.zeros(n, dtype=np.int64)
+    return inter_arrival, service_times, priority
+
+def arrival_stream(cum, service, with_priority, streams, limit=None, classes=3, antithetic=False, profiler=None):
+    # Yields (inter_arrival, arrival, service, priority) per customer, sampled in growing
+    # chunks so memory stays bounded however long the run is. The first customer arrives at 0.
+    produced, size, clock = 0, 1024, 0
+    while limit is None or produced < limit:
+        size_now = size if limit is None else min(size, limit - produced)
+        with profile_stage(profiler, "sample_inputs", size_now):
+            inter, services, priority = sample_inputs(size_now, cum, service, with_priority, streams, classes, antithetic)
+        if produced == 0:
+            inter[0] = 0
+        arrivals = clock + np.cumsum(inter)
+        clock = int(arrivals[-1])
+        yield from zip(inter.tolist(), arrivals.tolist(), services.tolist(), priority.tolist())
+        produced += size_now
+        size = min(size * 2, SAMPLE_CHUNK)
+
+def _inter_arrival_pmf(model):
+    # P(inter-arrival = k), k = 0 .. len(table) - 1, of the Poisson table lookup
+    _, cum = poisson_probs(model.lmbd)
+    p = np.diff(np.r_[0.0, cum])
+    p[-1] = 1 - (cum[-2] if len(cum) > 1 else 0.0)
+    return p
+
+def _service_tail(service):
+    # k = 2, 3, ... and P(V >= k) = P(X >= k - 1/2) of the rounded service time V = max(1, rint(X))
+    # (up to where the tail is negligible)
+    if service.kind == "exponential":
+        x = np.arange(2, math.ceil(40 * service.mu) + 2) - 0.5
+        tail = np.exp(-x / service.mu)
+    elif service.kind == "uniform":
+        x = np.arange(2, math.ceil(service.b) + 2) - 0.5
+        tail = np.clip((service.b - x) / (service.b - service.a), 0, 1)
+    else:
+        x = np.arange(2, math.ceil(service.mu + 40 * service.sigma) + 2) - 0.5
+        tail = np.array([0.5 * math.erfc((v - service.mu) / (service.sigma * math.sqrt(2))) for v in x])
+    return x + 0.5, tail
+
+def input_means(model, service):
+    # Exact expectations of the sampled inputs (after the table lookup and the rounding to at
+    # least 1 time unit), the known means for control variates on "Avg Service" and
+    # "Avg Inter Arrival". E[V] = 1 + sum_{k>=2} P(X >= k - 1/2) for V = max(1, rint(X)).
+    p = _inter_arrival_pmf(model)
+    mean_inter = float(np.dot(np.arange(len(p)), p))
+
+    if service.kind == "exponential":
+        m = service.mu
+        mean_service = 1 + math.exp(-1.5 / m) / -math.expm1(-1 / m)
+    else:
+        mean_service = 1 + float(_service_tail(service)[1].sum())
+    return {"Avg Service": mean_service, "Avg Inter Arrival": mean_inter}
+
+def input_variances(model, service):
+    # Exact variances of the same sampled inputs; E[V^2] = 1 + sum_{k>=2} (2k - 1) P(V >= k)
+    p = _inter_arrival_pmf(model)
+    k = np.arange(len(p))
+    means = input_means(model, service)
+    k_service, tail = _service_tail(service)
+    second = 1 + float(np.dot(2 * k_service - 1, tail))
+    return {"Avg Service": second - means["Avg Service"] ** 2,
+            "Avg Inter Arrival": float(np.dot(k ** 2, p)) - means["Avg Inter Arrival"] ** 2}
+
+def generate_simulation(model, service, rng=None, run_length=None, keep_rows=None, progress=None, cancel=None,
+                        trace=None, antithetic=False, profiler=None):
+    # rng: seed (int or np.random.SeedSequence) or numpy Generator; each input process gets its own
+    #   child stream spawned from it (input_streams). Default: fresh entropy, not reproducible;
+    #   callers that need to replay a run pick new_seed() first.
+    # antithetic: mirror every input draw of the run with the same rng (antithetic pair partner)
+    # run_length: RunLength stopping rules; by default one customer per Poisson table row
+    # keep_rows: None keeps every customer's row and Gantt segments; an int K switches to
+    #   streaming mode, where only customers 1..K are kept for display and the summary comes
+    #   from online accumulators (memory O(servers + customers in system + K))
+    # progress: callable receiving a progress_record dict every PROGRESS_EVERY events and at the end
+    # cancel: CancelToken checked at the same points; raises SimulationCancelled when set
+    # trace: writer with write(kind, records) (see trace_io); every completed customer and every
+    #   closed service segment is passed to it in TRACE_CHUNK-sized structured arrays as the run
+    #   goes, independent of keep_rows, so full traces never have to fit in memory
+    # profiler: Profiler timing the stages sample_inputs (inside event_loop), event_loop (count =
+    #   events), trace_write and build_results (count = rows)
+    streams = input_streams(rng)
+    run_length = run_length or RunLength()
+    s = model.s
+    with_priority = model.with_priority
+    preempt = with_priority and model.preemption
+
+    _, cum = poisson_probs(model.lmbd)
+    max_customers = len(cum) if run_length.is_default() else run_length.customers
+    horizon = run_length.horizon
+    max_completions = run_length.completions
+    if max_customers is None and horizon is None and max_completions is None:
+        raise ValueError("Run length needs a customer count, time horizon or completion count.")
+    keep_limit = float("inf") if keep_rows is None else keep_rows
+
+    stream = arrival_stream(cum, service, with_priority, streams, limit=max_customers,
+                            classes=model.priority_classes, antithetic=antithetic, profiler=profiler)
+
+    # Per-customer state lives only while the customer is in the system:
+    # info[c] = [inter_arrival, arrival, service, priority, remaining, first_start, first_server, kept]
+    # (only kept customers have their rows and service segments recorded)
+    info = {}
+    rows = []       # kept customers: (id, inter, arrival, service, priority, start, end, server)
+    log = RecordLog(SEGMENT_DTYPE)
+    log_cust, log_server, log_start, log_end, log_kind = log.appenders()
+
+    # Trace buffers, flushed to the writer every TRACE_CHUNK records
+    if trace is not None:
+        trace_customers, trace_segments = RecordLog(CUSTOMER_DTYPE), RecordLog(SEGMENT_DTYPE)
+        tc_append = trace_customers.appenders()
+        ts_cust, ts_server, ts_start, ts_end, ts_kind = trace_segments.appenders()
+
+    # ---------- ONLINE STATISTICS ----------
+    wait_stats, tat_stats, resp_stats = RunningStats(), RunningStats(), RunningStats()
+    service_total = inter_total = inter_n = 0   # sampled inputs of completed customers (controls)
+    busy_time = [0] * s
+    busy_periods = [0] * s
+    longest_idle = [0] * s
+    free_since = [0] * s
+    area_q = area_l = 0
+    last_time = 0
+    makespan = 0
+
+    # Server slots: customer in service (None when free), start of the current segment, its end,
+    # and the waiting-line seq it was dispatched with (-1 when free)
+    srv_cust = [None] * s
+    srv_start = [0] * s
+    srv_end = [0] * s
+    srv_seq = [-1] * s
+
+    # Waiting line as a heap keyed by (priority, arrival, seq); seq keeps FIFO order between ties.
+    # Free servers are a heap of indices (lowest index is dispatched first). With preemption,
+    # running jobs are indexed in a heap that puts the worst (priority, arrival, seq) on top;
+    # entries of jobs that have since left their server go stale and are dropped lazily.
+    waiting = []
+    seq = 0
+    free = list(range(s))
+    running = []
+
+    # ---------- EVENT CALENDAR ----------
+    # Entries are (time, kind, id): completions (kind 0, id = server) are handled before
+    # arrivals (kind 1, id = customer) at the same instant. Only the next arrival is kept
+    # in the calendar; completions of preempted jobs go stale and are skipped when popped.
+    if profiler is not None:
+        profiler.begin("event_loop")
+    calendar = []
+    pending = next(stream, None)
+    if pending is not None and (horizon is None or pending[1] <= horizon):
+        heapq.heappush(calendar, (pending[1], ARRIVAL, 0))
+
+    started = time.perf_counter()
+    events = arrived = 0
+    next_check = PROGRESS_EVERY if progress or cancel else float("inf")
+
+    done = False
+    while calendar and not done:
+        current_time = calendar[0][0]
+
+        if events >= next_check:
+            next_check += PROGRESS_EVERY
+            if cancel is not None and cancel.cancelled:
+                if profiler is not None:
+                    profiler.end(events)
+                raise SimulationCancelled(f"Simulation cancelled after {events:,} events.")
+            if progress is not None:
+                progress(progress_record(events, arrived, tat_stats.n, current_time, time.perf_counter() - started,
+                                         max_customers, horizon, max_completions))
+
+        # Time-weighted areas under Q(t) (waiting line) and L(t) (customers in system)
+        area_q += len(waiting) * (current_time - last_time)
+        area_l += len(info) * (current_time - last_time)
+        last_time = current_time
+
+        # 1. Job end then free the server / 2. put new arrivals in waiting
+        while calendar and calendar[0][0] == current_time:
+            _, kind, idx = heapq.heappop(calendar)
+            events += 1
+            if kind == COMPLETION:
+                c = srv_cust[idx]
+                if c is not None and srv_end[idx] <= current_time:
+                    srv_cust[idx] = None
+                    srv_seq[idx] = -1
+                    heapq.heappush(free, idx)
+                    busy_time[idx] += current_time - srv_start[idx]
+                    free_since[idx] = current_time
+                    inter, arrival, svc, prio, _, start, first_server, kept = info.pop(c)
+                    tat = current_time - arrival
+                    wait_stats.add(max(0, tat - svc))
+                    tat_stats.add(tat)
+                    service_total += svc
+                    if c:   # the first customer's inter-arrival is fixed at 0
+                        inter_total += inter
+                        inter_n += 1
+                    resp_stats.add(start - arrival)
+                    makespan = current_time
+                    if kept:
+                        rows.append((c, inter, arrival, svc, prio, start, current_time, first_server))
+                        log_cust(c + 1); log_server(idx + 1); log_kind(SERVED)
+                        log_start(srv_start[idx]); log_end(srv_end[idx])
+                    if trace is not None:
+                        for append, value in zip(tc_append, (c + 1, inter, arrival, svc, prio, start,
+                                                             current_time, first_server)):
+                            append(value)
+                        ts_cust(c + 1); ts_server(idx + 1); ts_kind(SERVED)
+                        ts_start(srv_start[idx]); ts_end(srv_end[idx])
+                        if len(trace_customers) >= TRACE_CHUNK:
+                            with profile_stage(profiler, "trace_write", TRACE_CHUNK):
+                                trace.write("customers", trace_customers.to_numpy())
+                            trace_customers.clear()
+                        if len(trace_segments) >= TRACE_CHUNK:
+                            with profile_stage(profiler, "trace_write", TRACE_CHUNK):
+                                trace.write("segments", trace_segments.to_numpy())
+                            trace_segments.clear()
+                    if max_completions is not None and tat_stats.n >= max_completions:
+                        done = True
+                        break
+            else:
+                inter, arrival, svc, prio = pending
+                info[idx] = [inter, arrival, svc, prio, svc, None, None, idx < keep_limit]
+                heapq.heappush(waiting, (prio, arrival, seq, idx))
+                seq += 1
+                arrived = idx + 1
+                pending = next(stream, None)
+                if pending is not None and (horizon is None or pending[1] <= horizon):
+                    heapq.heappush(calendar, (pending[1], ARRIVAL, idx + 1))
+        if done:
+            break
+
+        # 3. Hand waiting jobs to free servers, lowest index first. Once none is free, a job that
+        # outranks the worst job in service preempts it (preemptive resume), O(log s) per swap.
+        while waiting:
+            if free:
+                j = heapq.heappop(free)
+            elif preempt:
+                while srv_seq[running[0][3]] != -running[0][2]:
+                    heapq.heappop(running)
+                if waiting[0][0] >= -running[0][0]:
+                    break
+                j = heapq.heappop(running)[3]
+                curr_c = srv_cust[j]
+                state = info[curr_c]
+                if state[7]:
+                    log_cust(curr_c + 1); log_server(j + 1); log_kind(PREEMPTED)
+                    log_start(srv_start[j]); log_end(current_time)
+                if trace is not None:
+                    ts_cust(curr_c + 1); ts_server(j + 1); ts_kind(PREEMPTED)
+                    ts_start(srv_start[j]); ts_end(current_time)
+                state[4] = srv_end[j] - current_time
+                busy_time[j] += current_time - srv_start[j]
+                free_since[j] = current_time
+                heapq.heappush(waiting, (state[3], state[1], seq, curr_c))
+                seq += 1
+            else:
+                break
+
+            prio, arrival, key, c = heapq.heappop(waiting)
+            state = info[c]
+            end = current_time + state[4]
+            if state[5] is None:
+                state[5], state[6] = current_time, j + 1
+            # A server picking up work the instant it was freed stays in the same busy period
+            if busy_periods[j] == 0 or current_time > free_since[j]:
+                busy_periods[j] += 1
+                longest_idle[j] = max(longest_idle[j], current_time - free_since[j])
+            srv_cust[j] = c
+            srv_start[j] = current_time
+            srv_end[j] = end
+            heapq.heappush(calendar, (end, COMPLETION, j))
+            if preempt:
+                srv_seq[j] = key
+                heapq.heappush(running, (-prio, -arrival, -key, j))
+                if len(running) > 2 * s + 64:
+                    running = [e for e in running if srv_seq[e[3]] == -e[2]]
+                    heapq.heapify(running)
+
+    if profiler is not None:
+        profiler.end(events)
+    if tat_stats.n == 0:
+        raise ValueError("No customers completed within the requested run length.")
+    if trace is not None:
+        with profile_stage(profiler, "trace_write", len(trace_customers) + len(trace_segments)):
+            trace.write("customers", trace_customers.to_numpy())
+            trace.write("segments", trace_segments.to_numpy())
+    if progress is not None:
+        record = progress_record(events, arrived, tat_stats.n, makespan, time.perf_counter() - started,
+                                 max_customers, horizon, max_completions)
+        progress(dict(record, fraction=1.0, eta=0.0))
+
+    # Close the books at the makespan: jobs still in service (completion-count stop) count
+    # as busy, idle servers count their trailing idle gap
+    for j in range(s):
+        if srv_cust[j] is not None:
+            busy_time[j] += makespan - srv_start[j]
+        else:
+            longest_idle[j] = max(longest_idle[j], makespan - free_since[j])
+
+    summary = {
+        "Customers": tat_stats.n,
+        "Avg Waiting": wait_stats.mean, "Avg Turnaround": tat_stats.mean, "Avg Response": resp_stats.mean,
+        "Std Waiting": wait_stats.std, "Std Turnaround": tat_stats.std, "Std Response": resp_stats.std,
+        "Avg Queue Length": area_q / makespan if makespan > 0 else 0.0,
+        "Avg In System": area_l / makespan if makespan > 0 else 0.0,
+        "Utilization": sum(busy_time) / (makespan * s) if makespan > 0 else 0.0,
+        "Makespan": makespan,
+        "Avg Service": service_total / tat_stats.n,
+        "Avg Inter Arrival": inter_total / inter_n if inter_n else float("nan"),
+        "Servers": server_table(busy_time, busy_periods, longest_idle, makespan),
+    }
+
+    with profile_stage(profiler, "build_results", len(rows)):
+        df, gantt = build_results(rows, log, cum, with_priority)
+    return df, summary, gantt
+
+def build_results(rows, log, cum, with_priority):
+    # Rows arrive in completion order; present them by customer ID. The Gantt log keeps the
+    # segments of those customers only (not of kept customers still in the system at the stop),
+    # ordered by customer and start time.
+    rows = sorted(rows, key=lambda r: r[0])
+    n = len(rows)
+    gantt = log.to_numpy()
+    gantt = gantt[np.isin(gantt["cust"], np.array([r[0] + 1 for r in rows], dtype=np.int64))]
+    gantt = gantt[np.lexsort((gantt["start"], gantt["cust"]))]
+
+    if n:
+        ids, inter_arrival, arrivals, original_service, priority, start_times, end_times, server_assigned = \
+            (list(col) for col in zip(*rows))
+    else:
+        ids, inter_arrival, arrivals, original_service, priority, start_times, end_times, server_assigned = \
+            ([] for _ in range(8))
+
+    # Metrics calculation
+    tat = [end_times[i] - arrivals[i] for i in range(n)]
+    wt = [max(0, tat[i] - original_service[i]) for i in range(n)]
+    rt = [start_times[i] - arrivals[i] for i in range(n)]
+
+    # Cumulative-probability columns only exist for rows covered by the Poisson table
+    lookup = [0.0] + cum[:-1]
+    df = pd.DataFrame({
+        "     ID": [c + 1 for c in ids],
+        "Cum. Prob.": [cum[c] if c < len(cum) else np.nan for c in ids],
+        "C.P Lookup": [lookup[c] if c < len(cum) else np.nan for c in ids],
+        "Inter Arrival": inter_arrival, "Arrival Time": arrivals,
+        "Service Time": original_service, "Priority": priority if with_priority else "–",
+        "Start Time": start_times, "End Time": end_times,
+        "Waiting Time": wt, "Turnaround Time": tat, "Response Time": rt,
+        "Server": server_assigned
+    })
+
+    return df, gantt
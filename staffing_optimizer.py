@@ -0,0 +1,131 @@
+import math
+
+from queuing_models import erlang_b, erlang_b_lookup, erlang_c_from_b, mms_p0
+
+# Staffing / sizing searches over the multi-server calculator models.
+# All three models share the M/M/s Erlang C core; M/G/s and G/G/s only scale Wq by a constant
+# factor, so the searches step the Erlang B recurrence one server at a time instead of
+# re-evaluating the model from scratch for every candidate s.
+
+SIZING_MODELS = ["M/M/s", "M/G/s", "G/G/s"]
+SIZING_TARGETS = ["Wq", "Pw", "ρ"]
+
+def wait_factor(model, ca2=1.0, cs2=1.0):
+    # Wq multiplier applied to the M/M/s value by compute_mgs / compute_ggs
+    if model == "M/M/s": return 1.0
+    if model == "M/G/s": return (1 + cs2) / 2
+    if model == "G/G/s": return (ca2 + cs2) / 2
+    raise ValueError(f"Unsupported model for sizing: {model}")
+
+def _variation(model, ca2, cs2):
+    if model == "M/M/s": return 1.0, 1.0
+    if model == "M/G/s": return 1.0, cs2
+    return ca2, cs2
+
+def _metrics(model, lmbd, mu, s, b, ca2, cs2):
+    # Same outputs as compute_mms / compute_mgs / compute_ggs, from a known Erlang B value
+    a = lmbd / mu
+    C = erlang_c_from_b(s, a, b)
+    Wq = C / (s * mu - lmbd) * wait_factor(model, ca2, cs2)
+    Ca2, Cs2 = _variation(model, ca2, cs2)
+    return {"s": s, "μ": mu, "ρ": a / s, "P0": mms_p0(s, a, C), "Lq": lmbd * Wq, "L": lmbd * (Wq + 1 / mu),
+            "Wq": Wq, "W": Wq + 1 / mu, "Pw": C, "Ca2": Ca2, "Cs2": Cs2}
+
+def _check(model, lmbd, mu=None, ca2=1.0, cs2=1.0):
+    if model not in SIZING_MODELS: return f"Unsupported model for sizing: {model}"
+    if lmbd <= 0: return "Arrival rate must be > 0."
+    if mu is not None and mu <= 0: return "Service rate must be > 0."
+    if ca2 < 0 or cs2 < 0: return "Variation (CV²) values cannot be negative."
+    return None
+
+def _meets(res, target, limit):
+    return res[target] <= limit
+
+# ---------- MINIMUM SERVERS ----------
+def min_servers(model, lmbd, mu, target, limit, ca2=1.0, cs2=1.0, s_max=10**6):
+    error = _check(model, lmbd, mu, ca2, cs2)
+    if error: return {"error": error}
+    if target not in SIZING_TARGETS: return {"error": f"Unknown target: {target}"}
+    if limit <= 0: return {"error": "Target must be > 0."}
+
+    a = lmbd / mu
+    s = math.floor(a) + 1  # smallest stable staffing
+    if target == "ρ":
+        s = max(s, math.ceil(a / limit - 1e-12))
+    if s > s_max: return {"error": f"More than {s_max:,} servers required."}
+
+    # One Erlang B evaluation (shared table), then B(s+1) = a B(s) / (s + 1 + a B(s)) per extra server
+    b = erlang_b_lookup(s, a)
+    res = _metrics(model, lmbd, mu, s, b, ca2, cs2)
+    steps = 1
+    while not _meets(res, target, limit):
+        if s >= s_max: return {"error": f"Target not reached within {s_max:,} servers."}
+        s += 1
+        b = a * b / (s + a * b)
+        res = _metrics(model, lmbd, mu, s, b, ca2, cs2)
+        steps += 1
+    res["Evaluations"] = steps
+    return res
+
+# ---------- MINIMUM SERVICE RATE ----------
+def min_service_rate(model, lmbd, s, target, limit, ca2=1.0, cs2=1.0, rel_tol=1e-10):
+    error = _check(model, lmbd, None, ca2, cs2)
+    if error: return {"error": error}
+    if target not in SIZING_TARGETS: return {"error": f"Unknown target: {target}"}
+    if s < 1: return {"error": "Servers must be 1 or more."}
+    if limit <= 0: return {"error": "Target must be > 0."}
+    if target in ["Pw", "ρ"] and limit >= 1: return {"error": "Probability / utilization targets must be below 100%."}
+
+    if target == "ρ":
+        mu = lmbd / (s * limit)
+        res = _metrics(model, lmbd, mu, s, erlang_b(s, lmbd / mu), ca2, cs2)
+        res["Evaluations"] = 1
+        return res
+
+    # Wq and Pw both fall monotonically as μ grows: bracket by doubling above the stability
+    # limit λ/s, then bisect keeping `hi` feasible
+    evaluate = lambda m: _metrics(model, lmbd, m, s, erlang_b(s, lmbd / m), ca2, cs2)
+    lo = lmbd / s
+    hi = 2 * lo
+    res = evaluate(hi)
+    steps = 1
+    while not _meets(res, target, limit):
+        lo, hi = hi, 2 * hi
+        res = evaluate(hi)
+        steps += 1
+    best = res
+    while hi - lo > rel_tol * hi:
+        mid = (lo + hi) / 2
+        res = evaluate(mid)
+        steps += 1
+        if _meets(res, target, limit): hi, best = mid, res
+        else: lo = mid
+    best["Evaluations"] = steps
+    return best
+
+# ---------- COST OPTIMUM ----------
+def optimal_servers_cost(model, lmbd, mu, server_cost, wait_cost, ca2=1.0, cs2=1.0, s_max=10**6):
+    # Total cost rate = server_cost * s + wait_cost * Lq. Lq is convex and decreasing in s,
+    # so the first s where the cost stops falling is the global optimum.
+    error = _check(model, lmbd, mu, ca2, cs2)
+    if error: return {"error": error}
+    if server_cost < 0 or wait_cost < 0: return {"error": "Costs cannot be negative."}
+
+    a = lmbd / mu
+    s = math.floor(a) + 1
+    if s > s_max: return {"error": f"More than {s_max:,} servers required."}
+    b = erlang_b_lookup(s, a)
+    best = _metrics(model, lmbd, mu, s, b, ca2, cs2)
+    best_cost = server_cost * s + wait_cost * best["Lq"]
+    steps = 1
+    while s < s_max:
+        s += 1
+        b = a * b / (s + a * b)
+        res = _metrics(model, lmbd, mu, s, b, ca2, cs2)
+        cost = server_cost * s + wait_cost * res["Lq"]
+        steps += 1
+        if cost >= best_cost: break
+        best, best_cost = res, cost
+    best.update({"Server Cost": server_cost * best["s"], "Waiting Cost": wait_cost * best["Lq"],
+                 "Total Cost": best_cost, "Evaluations": steps})
+    return best
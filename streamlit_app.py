@@ -1,348 +1,99 @@
 import streamlit as st
-import math, random, pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+import os, time, json
+from dataclasses import asdict
+from pathlib import Path
 
-from queuing_calculator import queuing_calculator_ui
-
-# ---------- POISSON PROBABILITY FUNCTION ----------
-def poisson_probs(lam):
-    probs, cum = [], []
-    i, total = 0, 0.0
-    
-    while True:
-        p = math.exp(-lam) * (lam ** i) / math.factorial(i)
-        total += p
-        
-        rounded_p = round(p, 5)
-        rounded_cp = round(total, 5)
-        
-        if rounded_cp >= 0.99999:
-            probs.append(rounded_p)
-            cum.append(1.00000)
-            break
-            
-        probs.append(rounded_p)
-        cum.append(rounded_cp)
-        i += 1
-        
-        # Safe break
-        if i > 50: break 
-        
-    return probs, cum
-
-# ---------- Utilization and queue length Graphs ----------
-def get_time_series_data(df, max_time, num_servers, gantt):
-    times = sorted(list(set(df['Arrival Time'].tolist() + df['Start Time'].tolist() + df['End Time'].tolist() + [0, max_time])))
-    queue_length = []
-    server_status = {s_id: [] for s_id in range(1, num_servers + 1)}
-
-    for t in times:
-        waiting = df[(df['Arrival Time'] <= t) & (df['Start Time'] > t)].shape[0]
-        queue_length.append(waiting)
-        
-        for s_id in range(1, num_servers + 1):
-            is_busy = 0
-            for cust_segments in gantt:
-                for seg in cust_segments:
-                    if seg['server'] == s_id and seg['start'] <= t < seg['end']:
-                        is_busy = 1
-                        break
-                if is_busy: break
-            server_status[s_id].append(is_busy)
-        
-    return times, queue_length, server_status
-
-def validate_inputs(lmbd, mu=None, sigma=None, a=None, b=None, s=1):
-    errors = []
-
-    # Arrival rate
-    if lmbd is None or lmbd <= 0:
-        errors.append("λ (Arrival Rate) cannot be zero or negative.")
-
-    # Servers
-    if s <= 0:
-        errors.append("Number of servers (s) must be at least 1.")
-
-    # MM models
-    if st.session_state.model in ["MM1", "MMS"]:
-        if mu is None or mu <= 0:
-            errors.append("μ (Service Rate) cannot be zero or negative.")
-
-    # MG models
-    if st.session_state.model in ["MG1", "MGS"]:
-
-        if st.session_state.service_dist == "normal":
-            if mu is None or mu <= 0:
-                errors.append("μ (Mean Service Time) cannot be zero or negative.")
-            if sigma is None or sigma <= 0:
-                errors.append("σ (Standard Deviation) cannot be zero or negative.")
-
-        if st.session_state.service_dist == "uniform":
-            if a is None or a <= 0:
-                errors.append("a (Minimum Service Time) cannot be zero or negative.")
-            if b is None or b <= 0:
-                errors.append("b (Maximum Service Time) cannot be zero or negative.")
-            if b <= a:
-                errors.append("b (Maximum Service Time) must be greater than a (Minimum Service Time).")
-
-    return errors
-
-# ---------- SIMULATION FUNCTION ----------
-def generate_simulation(lmbd, mu, s, sigma=None, a=None, b=None, with_priority=False, preemption=False):
-
-    probs, cum = poisson_probs(lmbd)
-    n = len(cum)
-
-    inter_arrival = [0]
-    arrivals = [0]
-    for _ in range(1, n):
-        r = random.random()
-        idx = next((i for i, c in enumerate(cum) if r < c), len(cum) - 1)
-        inter_arrival.append(idx)
-        arrivals.append(arrivals[-1] + idx)
-
-    original_service = []
-
-    for _ in range(n):
-
-        # ---------- MM MODELS ----------
-        if st.session_state.model in ["MM1", "MMS"]:
-            stime = -math.log(random.random()) * mu
-
-        # ---------- MG MODELS ----------
-        else:
-            r1 = random.random()
-            r2 = random.random()
-
-            # Uniform Distribution
-            if st.session_state.service_dist == "uniform":
-                stime = a + (b - a) * r1
-
-            # Normal Distribution 
-            else:
-                stime = mu + sigma * math.sqrt(-2 * math.log(r1)) * math.cos(2 * math.pi * r2)
-
-        # Safety
-        original_service.append(max(1, int(round(stime))))
-
-
-    remaining = original_service.copy()
-    priority = [random.randint(1, 3) for _ in range(n)] if with_priority else [0]*n
-    
-    servers = [{"cust": None, "end": 0} for _ in range(s)]
-    gantt = [[] for _ in range(n)]
-    waiting = []
-    
-    current_time = 0
-   
-    event_times = sorted(list(set(arrivals)))
-
-    while current_time < max(arrivals) + sum(original_service) + 10:
-        # 1. Job end then free the server
-        for j in range(s):
-            if servers[j]["cust"] is not None and servers[j]["end"] <= current_time:
-                servers[j]["cust"] = None
-
-        # 2. put new arrivals in waiting
-        for i in range(n):
-            if arrivals[i] == current_time:
-                waiting.append(i)
-
-        # 3. Priority Sort
-        if with_priority:
-            waiting.sort(key=lambda x: (priority[x], arrivals[x]))
-        else:
-            waiting.sort(key=lambda x: arrivals[x])
-
-        # 4. Preemption Logic
-        if with_priority and preemption and waiting:
-            for j in range(s):
-                curr_c = servers[j]["cust"]
-                if curr_c is not None:
-                    if priority[waiting[0]] < priority[curr_c]:
-                        # Preempt 
-                        gantt[curr_c][-1]["end"] = current_time
-                        remaining[curr_c] = servers[j]["end"] - current_time
-                        waiting.append(curr_c)
-                        servers[j]["cust"] = None
-                        # Sort again
-                        waiting.sort(key=lambda x: (priority[x], arrivals[x]))
-
-        # 5. Give job to free servers (WITHOUT unnecessary switching)
-        for j in range(s):
-            if servers[j]["cust"] is None and waiting:
-                c = waiting.pop(0)
-                gantt[c].append({
-                    "start": current_time,
-                    "end": current_time + remaining[c],
-                    "server": j + 1
-                })
-                servers[j] = {"cust": c, "end": current_time + remaining[c]}
-
-        # Stop condition
-        if not waiting and all(srv["cust"] is None for srv in servers) and current_time >= max(arrivals):
-            break
-            
-        # Event-based skipping
-        next_arrival = min([a for a in arrivals if a > current_time], default=float('inf'))
-        next_finish = min([srv["end"] for srv in servers if srv["cust"] is not None], default=float('inf'))
-        current_time = min(next_arrival, next_finish)
-        if current_time == float('inf'): break
-
-    # Metrics calculation 
-    start_times = [min(seg["start"] for seg in gantt[i]) for i in range(n)]
-    end_times = [max(seg["end"] for seg in gantt[i]) for i in range(n)]
-    tat = [end_times[i] - arrivals[i] for i in range(n)]
-    wt = [max(0, tat[i] - original_service[i]) for i in range(n)]
-    rt = [start_times[i] - arrivals[i] for i in range(n)]
-    server_assigned = [gantt[i][0]["server"] for i in range(n)]
-
-    df = pd.DataFrame({
-        "     ID": range(1, n+1), "Cum. Prob.": cum, "C.P Lookup": [0.0] + cum[:-1],
-        "Inter Arrival": inter_arrival, "Arrival Time": arrivals,
-        "Service Time": original_service, "Priority": priority if with_priority else "–",
-        "Start Time": start_times, "End Time": end_times,
-        "Waiting Time": wt, "Turnaround Time": tat, "Response Time": rt,
-        "Server": server_assigned
-    })
-
-    return df, {"Avg Waiting": sum(wt)/n, "Avg Turnaround": sum(tat)/n}, gantt
+# pandas, matplotlib, the engine and the calculator are imported by the pages that use them
+# (see PAGE LOGIC), so the landing and navigation pages start without loading them.
 
 # ---------- STREAMLIT UI STYLING ----------
+# Static stylesheet: style-only HTML goes to the event container (no layout space), and the
+# browser caches the message, so reruns only send its hash (global.minCachedMessageSize)
 st.set_page_config(page_title="Simulation System", layout="centered")
-st.markdown("""
-<style>
-body {
-    background: linear-gradient(135deg, #F3E5F5 0%, #E0F7FA 100%);
-}
-div[data-testid="stAppViewContainer"] {
-    background: linear-gradient(135deg, #F3E5F5 0%, #E0F7FA 100%);
-}
-h1 {color: #6A1B9A; text-align: center; font-size: 55px; text-shadow: 1px 1px 3px rgba(0,0,0,0.08);}
-h2, h3, h4 {color: #00897B;}
-.stButton > button {
-    background: linear-gradient(90deg, #BA68C8, #4DB6AC);
-    color: white !important;
-    border: none;
-    border-radius: 12px;
-    padding: 0.6em 1.2em;
-    font-size: 17px;
-    font-weight: bold;
-    transition: all 0.3s ease;
-    box-shadow: 0 3px 7px rgba(0,0,0,0.15);
-}
-.stButton > button:hover {
-    background: linear-gradient(90deg, #BA68C8, #4DB6AC);
-    transform: scale(1.05);
-    box-shadow: 0 5px 10px rgba(0,0,0,0.2);
-}
-div[data-testid="stDataFrame"] {
-    background-color: white;
-    border-radius: 15px;
-    padding: 12px;
-    box-shadow: 0 0 12px rgba(0,0,0,0.1);
-}
-input, select, textarea {
-    background-color: white !important;
-    color: #333 !important;
-    border: 1px solid #BDBDBD !important;
-    border-radius: 8px !important;
-    padding: 0.4em !important;
-    box-shadow: 0 1px 2px rgba(0,0,0,0.05);
-}
-[data-testid="stMetricValue"] {
-    color: #6A1B9A;
-    font-size: 30px;
-}
-[data-testid="stMetricLabel"] {
-    color: #00897B;
-    font-weight: bold;
-}
-/* Gradient Background */
-[data-testid="stAppViewContainer"] {
-    background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-}
-
-/* Hero Section */
-.hero-section {
-    padding: 50px 20px;
-    text-align: center;
-    background: white;
-    border-radius: 20px;
-    box-shadow: 0 10px 30px rgba(0,0,0,0.05);
-    margin-bottom: 40px;
-}
-
-    /* Modern Cards */
-.option-card {
-    background: white;
-    padding: 30px;
-    border-radius: 20px;
-    border: 1px solid #e1e4e8;
-    transition: all 0.3s ease;
-    text-align: center;
-    min-height: 350px;
-    display: flex;
-    flex-direction: column;
-    justify-content: space-between;
-}
-
-.option-card:hover {
-    transform: translateY(-10px);
-    box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-    border-color: #6A1B9A;
-}
-
-.icon-circle {
-    width: 80px;
-    height: 80px;
-    background: #f3e5f5;
-    border-radius: 50%;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    margin: 0 auto 20px auto;
-    font-size: 40px;
-}
-
-.card-title {
-    color: #6A1B9A;
-    font-size: 24px;
-    font-weight: bold;
-    margin-bottom: 15px;
-}
-
-.card-text {
-    color: #586069;
-    font-size: 16px;
-    line-height: 1.5;
-    margin-bottom: 25px;
-}
-.footer-card {
-    text-align: center;
-    padding: 20px;
-    background-color: #f8f9fa;
-    border-radius: 15px;
-    border: 1px solid #e1e4e8;
-    height: 150px;
-    display: flex;
-    flex-direction: column;
-    justify-content: center;
-    align-items: center;
-    box-shadow: 0 4px 6px rgba(0,0,0,0.02);
-}
-.footer-icon {
-    font-size: 30px;
-    margin-bottom: 10px;
-}
-.footer-text {
-    font-weight: bold;
-    color: #00897B;
-    font-size: 16px;
-}
-</style>
-""", unsafe_allow_html=True)
+st.html(Path(__file__).with_name("app_style.css"))
+
+# ---------- PROGRESS ----------
+def progress_text(p):
+    eta = "–" if p["eta"] is None else f"{p['eta']:.1f} s"
+    return (f"{p['events']:,} events · {p['completed']:,} customers served · "
+            f"simulated time {p['sim_time']:,.2f} · ETA {eta}")
+
+# ---------- TIMELINE CHARTS ----------
+# A fragment, so zooming re-renders only these charts and keeps the rest of the results on screen.
+# Every chart is reduced to a pixel-bounded number of points, whatever the run length.
+@st.fragment
+def timeline_section(times, q_t, segments, num_servers, key="timeline_window", profiler=None):
+    horizon = float(times[-1]) if len(times) else 0.0
+    window = None
+    if horizon > 0:
+        window = st.slider("Zoom (time window)", 0.0, horizon, (0.0, horizon), key=key)
+    timeline_charts(times, q_t, segments, num_servers, horizon, window, profiler)
+
+@st.fragment
+def trace_timeline_section(trace, num_servers, key="trace_window", profiler=None):
+    # Only the chosen window of a trace is read: by default its first WINDOW_SEGMENTS service
+    # segments, and never more than MAX_WINDOW_SEGMENTS records, whatever the trace's size
+    span = trace.segment_end(-1)
+    if span <= 0:
+        st.info("ℹ️ The trace holds no service segments to chart.")
+        return
+    window = st.slider("Time window", 0.0, span, (0.0, trace.segment_end(WINDOW_SEGMENTS - 1)), key=key)
+    if window[1] <= window[0]:
+        st.info("ℹ️ Choose a non-empty time window.")
+        return
+    try:
+        with profile_stage(profiler, "trace_window"):
+            times, q_t, segments = trace.window(*window, limit=MAX_WINDOW_SEGMENTS)
+    except ValueError as e:
+        st.warning(f"⚠️ {e}")
+        return
+    st.caption(f"Charts cover t ∈ [{window[0]:,.2f}, {window[1]:,.2f}] of {span:,.2f}; only this window is read "
+               f"from the trace ({len(segments):,} segments).")
+    timeline_charts(times, q_t, gantt_segments(segments), num_servers, window[1], window, profiler)
+
+def timeline_charts(times, q_t, segments, num_servers, horizon, window, profiler=None):
+    st.subheader("📊 Queue Length Over Time $Q(t)$")
+    with profile_stage(profiler, "chart_queue", len(times)):
+        fig_q = queue_figure(times, q_t, horizon, window=window)
+        st.pyplot(fig_q)
+        plt.close(fig_q)
+
+    st.subheader("💡 Server Occupancy $B(t)$")
+    with profile_stage(profiler, "chart_occupancy", len(segments)):
+        fig_b = occupancy_figure(segments, num_servers, horizon, window=window)
+        st.pyplot(fig_b)
+        plt.close(fig_b)
+    st.caption("Stacked bands: time-averaged busy fraction of each server; line: peak number of busy servers.")
+
+    st.subheader("🧩 Server-wise Gantt Chart")
+    with profile_stage(profiler, "chart_gantt", len(segments)):
+        fig, info = gantt_figure(segments, num_servers, horizon, window=window)
+        st.pyplot(fig)
+        plt.close(fig)
+    if info["aggregated"]:
+        st.caption(f"{info['aggregated']:,} of {info['visible']:,} visible segments are narrower than two pixels "
+                   f"and drawn as grey busy runs; zoom in to see individual customers.")
+
+# ---------- DIAGNOSTICS ----------
+def diagnostics_section(profiler):
+    records = profiler.records()
+    total = sum(r["self_seconds"] for r in records)
+    with st.expander(f"🩺 Diagnostics ({total:.2f} s instrumented)"):
+        frame = pd.DataFrame([
+            {"Stage": r["stage"], "Calls": r["calls"], "Seconds": r["seconds"], "Self Seconds": r["self_seconds"],
+             "Share": r["self_seconds"] / total if total > 0 else 0.0, "Count": r["count"],
+             "Per Second": r["per_second"], "Peak MB": r["peak_mb"]}
+            for r in records
+        ])
+        st.dataframe(frame.style.format({"Seconds": "{:.4f}", "Self Seconds": "{:.4f}", "Share": "{:.1%}",
+                                         "Count": "{:,.0f}", "Per Second": "{:,.0f}", "Peak MB": "{:.2f}"},
+                                        na_rep="–"), use_container_width=True)
+        st.caption("Self seconds exclude nested stages (sample_inputs and trace_write run inside event_loop, "
+                   "which runs inside simulate). Count: events, rows, points or segments handled by the stage."
+                   + (" Peak MB: tracemalloc peak above the memory in use when the stage started."
+                      if any(r["peak_mb"] is not None for r in records) else ""))
+        st.download_button("Download diagnostics (JSON)", json.dumps(records, indent=2), "diagnostics.json",
+                           "application/json")
 
 # ---------- SESSION STATE ----------
 if "page" not in st.session_state:
@@ -551,6 +302,18 @@ elif st.session_state.page == "priority_options":
 
 # 4. Run Simulation
 elif st.session_state.page == "run":
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    from simulation_engine import (
+        ModelConfig, RunLength, service_for_model, validate_inputs, validate_run_length,
+        traffic_intensity, generate_simulation, queue_series, steady_state, new_seed, CancelToken, SimulationCancelled,
+        Profiler, profile_stage
+    )
+    from replications import (
+        run_replications, compare_replications, run_until_precision, fixed_customer_count, CONTROL_RUN_LENGTH_ERROR
+    )
+    from sim_charts import gantt_segments, gantt_figure, queue_figure, occupancy_figure
+    from trace_io import TRACE_FORMATS, WINDOW_SEGMENTS, MAX_WINDOW_SEGMENTS, TraceWriter, open_trace
 
     st.markdown(
         "<h3>Enter Simulation Parameters</h3>",
@@ -560,6 +323,7 @@ elif st.session_state.page == "run":
     with st.container():
 
         # ---------- Inputs ----------
+        mu = sigma = a = b = None
         lmbd = st.number_input(
             "λ (Arrival Rate)",
             #min_value=0.1,
@@ -615,18 +379,85 @@ elif st.session_state.page == "run":
                 step=1
             )
 
+        # ---------- Priority Classes ----------
+        priority_classes = 3
+        if st.session_state.priority:
+            priority_classes = st.number_input(
+                "Priority Classes (1 = highest)",
+                min_value=1,
+                value=3,
+                step=1
+            )
+
+        # ---------- Run Length ----------
+        length_mode = st.selectbox(
+            "Run Length",
+            ["Poisson Table Rows (default)", "Customers (N)", "Time Horizon (T)", "Completions (X)"]
+        )
+        run_length = RunLength()
+        if length_mode == "Customers (N)":
+            run_length.customers = int(st.number_input("Number of Customers (N)", min_value=1, value=100, step=10))
+        elif length_mode == "Time Horizon (T)":
+            run_length.horizon = st.number_input("Time Horizon (T)", min_value=0.0, value=200.0, step=10.0)
+        elif length_mode == "Completions (X)":
+            run_length.completions = int(st.number_input("Completions (X)", min_value=1, value=100, step=10))
+
+        keep_rows = None
+        if st.checkbox("Streaming statistics (summary only, bounded table)",
+                       help="Long runs: statistics are accumulated while simulating instead of keeping every customer."):
+            keep_rows = int(st.number_input("Rows to Keep for Display", min_value=0, value=100, step=50))
+
+        seed_input = st.number_input(
+            "Random Seed (blank = new seed every run)",
+            min_value=0,
+            value=None,
+            step=1,
+            help="Runs, replications and comparisons with the same seed reproduce the same numbers."
+        )
+
+        trace_dir = trace_fmt = None
+        if st.checkbox("Export trace to disk",
+                       help="Stream every customer and service segment to files while simulating."):
+            t_col1, t_col2 = st.columns([1, 2])
+            with t_col1:
+                trace_fmt = st.selectbox("Trace Format", list(TRACE_FORMATS), key="trace_fmt")
+            with t_col2:
+                trace_dir = st.text_input("Trace Directory", value=os.path.join("traces", time.strftime("run_%Y%m%d_%H%M%S")),
+                                          key="trace_dir")
+
+        diagnostics = st.checkbox("Diagnostics panel",
+                                  help="Time each stage of the run (sampling, event loop, tables, charts).")
+        track_memory = diagnostics and st.checkbox("Track peak memory per stage",
+                                                   help="tracemalloc makes the run several times slower.")
+
+        model_cfg = ModelConfig(
+            model=st.session_state.model,
+            lmbd=lmbd,
+            s=int(s),
+            with_priority=bool(st.session_state.priority),
+            preemption=bool(st.session_state.preemption),
+            priority_classes=int(priority_classes)
+        )
+        service_cfg = service_for_model(
+            st.session_state.model,
+            st.session_state.service_dist,
+            mu=mu, sigma=sigma, a=a, b=b
+        )
+
+        # Clicking Cancel (or any widget) reruns the script, which interrupts a running simulation
+        # before it can clean up; its token stays behind, already cancelled by the button callback
+        stale_token = st.session_state.pop("sim_cancel", None)
+        if stale_token is not None:
+            if stale_token.cancelled:
+                st.warning("⏹ Simulation cancelled.")
+            else:
+                st.warning("⚠️ The previous simulation was interrupted by a page rerun before it finished.")
+
         # ---------- Run Simulation ----------
         if st.button("▶️ Run Simulation"):
 
             # ---------- INPUT VALIDATION ----------
-            errors = validate_inputs(
-                lmbd=lmbd,
-                mu=mu if 'mu' in locals() else None,
-                sigma=sigma if 'sigma' in locals() else None,
-                a=a if 'a' in locals() else None,
-                b=b if 'b' in locals() else None,
-                s=s
-            )
+            errors = validate_inputs(model_cfg, service_cfg) + validate_run_length(run_length)
 
             if errors:
                 st.error("❌ Invalid Inputs:")
@@ -635,247 +466,398 @@ elif st.session_state.page == "run":
                     st.stop()  
 
             # ---------- RHO CALCULATION ----------
-            if st.session_state.model in ["MM1", "MMS"]:
-                rho = lmbd / (mu * s)
-
-            elif st.session_state.service_dist == "uniform":
-                mu = (a + b) / 2
-                rho = lmbd / (s * mu)
-
-            else:  # normal
-                rho = lmbd / (mu * s)
+            rho = traffic_intensity(model_cfg, service_cfg)
 
             if rho > 1:
                 st.error(
                     f"❌ Simulation does not execute as ρ = {rho:.3f} > 1"
                 )
             else:
+                seed = int(seed_input) if seed_input is not None else new_seed()
                 st.success(
-                    f"✅ Simulation executed successfully — ρ = {rho:.3f}"
+                    f"✅ Simulation executed successfully — ρ = {rho:.3f} · seed {seed}"
                 )
 
-                df, summary, gantt = generate_simulation(
-                    lmbd,
-                    mu,
-                    s,
-                    sigma=sigma if st.session_state.service_dist == "normal" else None,
-                    a=a if st.session_state.service_dist == "uniform" else None,
-                    b=b if st.session_state.service_dist == "uniform" else None,
-                    with_priority=st.session_state.priority,
-                    preemption=st.session_state.preemption
-                )
+                sim_bar = st.progress(0.0, text="Simulating...")
+                cancel_slot = st.empty()
+                cancel = st.session_state.sim_cancel = CancelToken()
+                cancel_slot.button("⏹ Cancel", on_click=cancel.cancel, key="sim_cancel_btn")
+                trace = failure = None
+                profiler = Profiler(memory=track_memory) if diagnostics else None
+                # tracemalloc is process-wide: stop it on every exit, including a rerun interrupting the script
+                try:
+                    try:
+                        if trace_dir:
+                            trace = TraceWriter(trace_dir, trace_fmt,
+                                                meta={"model": asdict(model_cfg), "service": asdict(service_cfg),
+                                                      "seed": seed})
+                        with profile_stage(profiler, "simulate"):
+                            df, summary, gantt = generate_simulation(
+                                model_cfg, service_cfg, rng=seed, run_length=run_length, keep_rows=keep_rows,
+                                progress=lambda p: sim_bar.progress(p["fraction"], text=progress_text(p)),
+                                cancel=cancel,
+                                trace=trace, profiler=profiler
+                            )
+                        if trace is not None:
+                            trace.close(summary)
+                    except SimulationCancelled as e:
+                        failure = st.warning, f"⏹ {e}"
+                    except ImportError as e:
+                        failure = st.error, f"❌ {e}"
+                    finally:
+                        cancel_slot.empty()
+                        # Failed, cancelled or interrupted by a rerun: no half-written trace is left behind
+                        if trace is not None and not trace.closed:
+                            trace.abort()
+                    # Only reached when the run was not interrupted by a rerun
+                    st.session_state.pop("sim_cancel", None)
+                    if failure is not None:
+                        show, message = failure
+                        show(message)
+                        st.stop()
+                    sim_bar.empty()
+                    if trace is not None:
+                        st.info(f"💾 Trace written to `{trace.path}` ({trace.counts['customers']:,} customers, "
+                                f"{trace.counts['segments']:,} segments)")
+
+                    # ---------- Table ----------
+                    with profile_stage(profiler, "table", len(df)):
+                        st.dataframe(
+                            df.style.format({
+                                "Cum. Prob.": "{:.5f}",
+                                "C.P Lookup": "{:.5f}"
+                            }, na_rep="–"),
+                            use_container_width=True
+                        )
 
-                # ---------- Table ----------
-                st.dataframe(
-                    df.style.format({
-                        "Cum. Prob.": "{:.5f}",
-                        "C.P Lookup": "{:.5f}"
-                    }),
-                    use_container_width=True
-                )
+                    # ---------- Time Series Calculations ----------
+                    if keep_rows is None:
+                        max_sim_time = df["End Time"].max()
+                        with profile_stage(profiler, "queue_series", len(df)):
+                            times, q_t = queue_series(df, gantt, max_sim_time)
+
+                    # ---------- STATISTICAL SUMMARY ----------
+                    st.markdown("### 📈 Simulation Summary Metrics")
+
+                    # ---- 1. Basic Metrics ----
+                    avg_wt = summary["Avg Waiting"]
+                    avg_tat = summary["Avg Turnaround"]
+                    avg_rt = summary["Avg Response"]
+
+                    # ---- 2. Individual Server Utilization (exact, accumulated in the event loop) ----
+                    server_stats = summary["Servers"]
+
+                    # ---- 3. Overall Utilization ----
+                    overall_utilization = summary["Utilization"]
+                    idle_factor = (1 - overall_utilization) * 100
+
+                    # ---------- UI Metrics ----------
+                    m_col1, m_col2, m_col3, m_col4 = st.columns(4)
+
+                    with m_col1:
+                        st.metric(
+                            "Avg Waiting Time (Wq)",
+                            f"{avg_wt:.2f}"
+                        )
+
+                    with m_col2:
+                        st.metric(
+                            "Avg Turnaround (W)",
+                            f"{avg_tat:.2f}"
+                        )
+
+                    with m_col3:
+                        st.metric("Avg Response (RT)", f"{avg_rt:.2f}")
+
+                    with m_col4:
+                        st.metric(
+                            "Total Customers",
+                            summary["Customers"]
+                        )
+
+                    q_col1, q_col2 = st.columns(2)
+                    with q_col1:
+                        st.metric("Avg Queue Length (Lq)", f"{summary['Avg Queue Length']:.2f}",
+                                  help="Time-average number of customers in the waiting line")
+                    with q_col2:
+                        st.metric("Avg In System (L)", f"{summary['Avg In System']:.2f}",
+                                  help="Time-average number of customers in the system")
+
+                    # ---------- Per Server Utilization ----------
+                    st.markdown("#### 🖥️ Server Utilization Details")
+
+                    u_cols = st.columns(s if s <= 4 else 4)
+
+                    for idx, (s_id, stats) in enumerate(server_stats.items()):
+                        with u_cols[idx % 4]:
+                            st.metric(
+                                f"Server {s_id} Util",
+                                f"{stats['Utilization']:.2%}",
+                                help=f"{stats['Busy Periods']} busy periods, longest idle gap {stats['Longest Idle']}"
+                            )
+
+                    with st.expander("Busy / idle breakdown per server"):
+                        st.dataframe(
+                            pd.DataFrame.from_dict(server_stats, orient="index").rename_axis("Server")
+                            .style.format({"Utilization": "{:.2%}"}),
+                            use_container_width=True
+                        )
 
-                # ---------- Time Series Calculations ----------
-                max_sim_time = df["End Time"].max()
-                # Pass 's' and 'gantt' to the new function
-                times, q_t, server_status_dict = get_time_series_data(df, max_sim_time, s, gantt)
-
-                # ---------- STATISTICAL SUMMARY ----------
-                st.markdown("### 📈 Simulation Summary Metrics")
-
-                # ---- 1. Basic Metrics ----
-                avg_wt = df["Waiting Time"].mean()
-                avg_tat = df["Turnaround Time"].mean()
-                avg_rt = df["Response Time"].mean()
-                total_sim_time = df["End Time"].max()
-
-                # ---- 2. Individual Server Utilization ----
-                server_busy_times = {}
-
-                for s_id, b_t_list in server_status_dict.items():
-                    busy_duration = 0
-                    for i in range(len(times) - 1):
-                        if b_t_list[i] == 1:
-                            busy_duration += (times[i + 1] - times[i])
-                    server_busy_times[s_id] = busy_duration
-
-                # ---- 3. Overall Utilization ----
-                total_busy_time = sum(server_busy_times.values())
-                overall_utilization = total_busy_time / (total_sim_time * s)
-                idle_factor = (1 - overall_utilization) * 100
-
-                # ---------- UI Metrics ----------
-                m_col1, m_col2, m_col3, m_col4 = st.columns(4)
-
-                with m_col1:
-                    st.metric(
-                        "Avg Waiting Time (Wq)",
-                        f"{avg_wt:.2f}"
-                    )
-
-                with m_col2:
-                    st.metric(
-                        "Avg Turnaround (W)",
-                        f"{avg_tat:.2f}"
-                    )
-
-                with m_col3:
-                    st.metric("Avg Response (RT)", f"{avg_rt:.2f}")
-
-                with m_col4:
-                    st.metric(
-                        "Total Customers",
-                        len(df)
-                    )
-
-                # ---------- Per Server Utilization ----------
-                st.markdown("#### 🖥️ Server Utilization Details")
-
-                u_cols = st.columns(s if s <= 4 else 4)
-
-                for idx, (s_id, b_time) in enumerate(server_busy_times.items()):
-                    s_util = b_time / total_sim_time
-                    with u_cols[idx % 4]:
+                    # ---------- Final Factors ----------
+                    f_col1, f_col2 = st.columns(2)
+
+                    with f_col1:
+                        st.metric(
+                            "Overall Utilization Factor",
+                            f"{overall_utilization:.2%}"
+                        )
+
+                    with f_col2:
                         st.metric(
-                            f"Server {s_id} Util",
-                            f"{s_util:.2%}"
+                            "System Idle Factor",
+                            f"{idle_factor:.2f}%"
                         )
 
-                # ---------- Final Factors ----------
-                f_col1, f_col2 = st.columns(2)
-
-                with f_col1:
-                    st.metric(
-                        "Overall Utilization Factor",
-                        f"{overall_utilization:.2%}"
-                    )
-
-                with f_col2:
-                    st.metric(
-                        "System Idle Factor",
-                        f"{idle_factor:.2f}%"
-                    )
-
-                st.markdown("---")
-
-                # ---------- Q(t) Graph (Optimized) ----------
-                st.subheader("📊 Queue Length Over Time $Q(t)$")
-                if times:
-                    fig_q, ax_q = plt.subplots(figsize=(15, 4))
-                    
-                    # Step plot with 'post' for correct staircase effect
-                    ax_q.step(times, q_t, where="post", color='#863F93', linewidth=1.5)
-                    
-                    ax_q.fill_between(times, q_t, step="post", facecolor="none", 
-                                      edgecolor="#863F93", hatch='xxx', alpha=0.4)
-                    
-                    ax_q.set_xlabel("t (Time)")
-                    ax_q.set_ylabel("Q(t)")
-
-                    ax_q.set_xticks(times) 
-                    plt.xticks(rotation=45, fontsize=8) 
-                    
-                    # Ensure y-axis shows only whole numbers (0, 1, 2, 3...)
-                    max_q = int(max(q_t)) if q_t else 0
-                    ax_q.set_yticks(range(max_q + 2))
-                    
-                    # Clean look like the screenshots
-                    ax_q.spines['top'].set_visible(False)
-                    ax_q.spines['right'].set_visible(False)
-                    ax_q.grid(axis='y', linestyle='--', alpha=0.3)
-                    
-                    plt.tight_layout()
-                    st.pyplot(fig_q)
-
-                # ---------- Individual B(t) Graphs for Each Server ----------
-                st.subheader("💡 Individual Server Utilization $B(t)$")
-                
-                for s_id, b_t_individual in server_status_dict.items():
-                    st.write(f"**Server {s_id} Status**")
-                    fig_b, ax_b = plt.subplots(figsize=(12, 2))
-                    
-                    # Black & White style
-                    ax_b.step(times, b_t_individual, where="post", color='#900E40', linewidth=1.5)
-                    ax_b.fill_between(times, b_t_individual, step="post", facecolor="none", 
-                                      edgecolor="#900E40", hatch='////', alpha=0.5)
-                    
-                    ax_b.set_ylim(-0.1, 1.2)
-                    ax_b.set_yticks([0, 1])
-                    ax_b.set_ylabel(f"B{s_id}(t)")
-
-                    ax_b.set_xticks(times)
-                    plt.xticks(rotation=45, fontsize=8)
-                    
-                    # Clean look
-                    ax_b.spines['top'].set_visible(False)
-                    ax_b.spines['right'].set_visible(False)
-                    plt.tight_layout()
-                    st.pyplot(fig_b)
-
-                # ---------- Utilization ----------
-                fig, ax = plt.subplots()
-                ax.bar(["Busy", "Idle"], [rho, max(0, 1 - rho)])
-                ax.set_ylabel("Fraction of Time")
-                ax.set_title("🧩 Server Utilization Overview")
-                st.pyplot(fig)
-
-
-                # ---------- Gantt Chart ----------
-                st.subheader("🧩 Server-wise Gantt Charts")
-                colors = ["#BA68C8","#FF8A65","#FFD54F","#4DB6AC","#64B5F6","#A1887F"]
-
-                max_sim_time = max(seg["end"] for segments in gantt for seg in segments)
-                server_timelines = {srv: [] for srv in range(1, s+1)}
-
-                for cust_id, segments in enumerate(gantt, start=1):
-                    for seg in segments:
-                        server_timelines[seg["server"]].append({
-                            "cust": f"C{cust_id}",
-                            "start": seg["start"],
-                            "end": seg["end"],
-                            "color": colors[cust_id % len(colors)]
-                        })
-
-                for srv_id, tasks in server_timelines.items():
-                    tasks.sort(key=lambda x: x["start"])
-                    merged_tasks = []
-                    if tasks:
-                        current_task = tasks[0].copy()
-                        for next_task in tasks[1:]:
-                            if next_task["cust"] == current_task["cust"] and next_task["start"] == current_task["end"]:
-                                current_task["end"] = next_task["end"]
+                    # ---------- Steady State (single run) ----------
+                    if keep_rows is None:
+                        with st.expander("🎯 Steady-State Estimates (MSER-5 warm-up + batch means)"):
+                            with profile_stage(profiler, "steady_state", len(df)):
+                                ss = steady_state(df, gantt, s)
+                            if "error" in ss:
+                                st.warning(ss["error"])
                             else:
-                                merged_tasks.append(current_task)
-                                current_task = next_task.copy()
-                        merged_tasks.append(current_task)
-
-                    filled_tasks = []
-                    clean_ticks = [0]
-                    last_end = 0
-                    for task in merged_tasks:
-                        if task["start"] > last_end:
-                            filled_tasks.append({"cust":"Idle","start":last_end,"end":task["start"],"color":"#FFCDD2","hatch":"///"})
-                        filled_tasks.append(task)
-                        clean_ticks += [task["start"], task["end"]]
-                        last_end = task["end"]
-                    if last_end < max_sim_time:
-                        filled_tasks.append({"cust":"Idle","start":last_end,"end":max_sim_time,"color":"#FFCDD2","hatch":"///"})
-                        clean_ticks.append(max_sim_time)
-
-                    fig, ax = plt.subplots(figsize=(25,2.5))
-                    for t in filled_tasks:
-                        duration = t["end"] - t["start"]
-                        ax.barh(0,duration,left=t["start"],color=t["color"],edgecolor="black",linewidth=0.5,hatch=t.get("hatch",""))
-                        if duration>0.3:
-                            ax.text(t["start"]+duration/2,0,t["cust"],ha="center",va="center",fontsize=11,fontweight="bold",color="white" if t["cust"]!="Idle" else "#B71C1C")
-                    ax.set_title(f"Server {srv_id}",loc="left",fontweight="bold")
-                    ax.set_yticks([])
-                    ax.set_xlabel("Time")
-                    ax.set_xlim(0,max_sim_time)
-                    ax.set_xticks(sorted(set(clean_ticks)))
-                    plt.xticks(rotation=45)
-                    for spine in ["top","right","left"]: ax.spines[spine].set_visible(False)
-                    plt.tight_layout()
-                    st.pyplot(fig)
+                                raw = {"Wq": avg_wt, "W": avg_tat, "Utilization": overall_utilization}
+                                st.dataframe(pd.DataFrame([
+                                    {"Metric": name, "All Customers": raw[name], "Steady State": ci["mean"],
+                                     "± Half-width": ci["half_width"], "CI Low": ci["low"], "CI High": ci["high"],
+                                     "Lag-1 Corr.": ci["lag1"]}
+                                    for name, ci in ss["intervals"].items()
+                                ]).style.format(precision=4), use_container_width=True)
+                                st.caption(f"Warm-up: first {ss['Warm-up Customers']:,} customers (t < "
+                                           f"{ss['Warm-up Time']:,.2f}) dropped; {ss['Batches']} batches, 95% confidence.")
+                                if ss["Warm-up At Limit"]:
+                                    st.warning("⚠️ No steady state detected in the first half of the run; run longer.")
+                                if any(ci["lag1"] > 0.2 for ci in ss["intervals"].values()):
+                                    st.warning("⚠️ Batch means are correlated (lag-1 > 0.2); "
+                                               "run longer for reliable intervals.")
+
+                    st.markdown("---")
+
+                    if keep_rows is not None and trace is not None:
+                        # Streaming run: the exported trace still holds every customer for the charts
+                        trace_timeline_section(open_trace(trace.path), s, key="run_trace_window", profiler=profiler)
+                    elif keep_rows is not None:
+                        st.info("ℹ️ Streaming mode: charts and Gantt need every customer, run without streaming "
+                                "(or export a trace) to see them.")
+                    else:
+                        # ---------- Utilization ----------
+                        with profile_stage(profiler, "chart_utilization"):
+                            fig, ax = plt.subplots()
+                            ax.bar(["Busy", "Idle"], [rho, max(0, 1 - rho)])
+                            ax.set_ylabel("Fraction of Time")
+                            ax.set_title("🧩 Server Utilization Overview")
+                            st.pyplot(fig)
+                            plt.close(fig)
+
+                        # ---------- Q(t), B(t) and Gantt Charts ----------
+                        with profile_stage(profiler, "gantt_segments", len(gantt)):
+                            segments = gantt_segments(gantt)
+                        timeline_section(times, q_t, segments, s, profiler=profiler)
+
+                    if profiler is not None:
+                        # Stops tracemalloc; zooming the timeline later still adds (time-only) chart stages
+                        profiler.close()
+                        diagnostics_section(profiler)
+                finally:
+                    if profiler is not None:
+                        profiler.close()
+
+        # ---------- Independent Replications ----------
+        st.markdown("---")
+        st.markdown("#### 🔁 Independent Replications")
+        r_col1, r_col2 = st.columns(2)
+        with r_col1:
+            n_reps = st.number_input("Replications (R)", min_value=2, value=30, step=1)
+        with r_col2:
+            confidence = st.selectbox("Confidence Level", [0.90, 0.95, 0.99], index=1, format_func=lambda c: f"{c:.0%}")
+        v_col1, v_col2 = st.columns(2)
+        with v_col1:
+            antithetic = st.checkbox("Antithetic pairs", help="Run replications in pairs, the second mirroring every "
+                                     "random draw of the first; needs an even number of replications.")
+        with v_col2:
+            control_variates = st.checkbox("Control variates", help="Adjust the estimates on the sampled mean service "
+                                           "and inter-arrival times, whose exact expectations are known "
+                                           "(run lengths given as a number of customers only).")
+
+        if st.button("🔁 Run Replications"):
+            errors = validate_inputs(model_cfg, service_cfg) + validate_run_length(run_length)
+            rho = traffic_intensity(model_cfg, service_cfg) if not errors else None
+
+            if errors:
+                st.error("❌ Invalid Inputs:")
+                for e in errors:
+                    st.write(f"• {e}")
+            elif rho > 1:
+                st.error(f"❌ Simulation does not execute as ρ = {rho:.3f} > 1")
+            elif antithetic and n_reps % 2:
+                st.error("❌ Antithetic replications come in pairs; use an even number of replications.")
+            elif control_variates and not fixed_customer_count(run_length):
+                st.error(f"❌ {CONTROL_RUN_LENGTH_ERROR}")
+            else:
+                rep_bar = st.progress(0.0, text=f"Running {int(n_reps)} replications...")
+                reps = run_replications(
+                    model_cfg, service_cfg, int(n_reps), confidence=confidence, run_length=run_length,
+                    seed=int(seed_input) if seed_input is not None else None,
+                    progress=lambda done, total: rep_bar.progress(done / total, text=f"{done} / {total} replications"),
+                    antithetic=antithetic, control_variates=control_variates
+                )
+                rep_bar.empty()
+
+                methods = [name for name, on in [("antithetic pairs", antithetic),
+                                                  ("control variates", control_variates)] if on]
+                st.success(f"✅ {int(n_reps)} replications on {reps['workers']} worker process(es)"
+                           + (f" · {' + '.join(methods)}" if methods else "") + f" · seed {reps['seed']}")
+                ci_rows = [
+                    {"Metric": name, "Mean": ci["mean"], "Std Dev": ci["std"], "± Half-width": ci["half_width"],
+                     "CI Low": ci["low"], "CI High": ci["high"]}
+                    for name, ci in reps["intervals"].items()
+                ]
+                st.dataframe(pd.DataFrame(ci_rows).style.format(precision=4), use_container_width=True)
+
+                c_col1, c_col2, c_col3, c_col4 = st.columns(4)
+                for col, name in zip([c_col1, c_col2, c_col3, c_col4], reps["intervals"]):
+                    ci = reps["intervals"][name]
+                    value = f"{ci['mean']:.2%}" if name == "Utilization" else f"{ci['mean']:.2f}"
+                    half = f"± {ci['half_width']:.2%}" if name == "Utilization" else f"± {ci['half_width']:.2f}"
+                    with col:
+                        st.metric(name, value, half, delta_color="off")
+
+                with st.expander("Per-replication results"):
+                    st.dataframe(pd.DataFrame(reps["replications"]), use_container_width=True)
+
+        # ---------- Sequential Stopping ----------
+        st.markdown("#### 🎯 Run Until Target Precision")
+        p_col1, p_col2, p_col3, p_col4 = st.columns(4)
+        with p_col1:
+            target_metric = st.selectbox("Metric", ["Wq", "W"], key="target_metric")
+        with p_col2:
+            target_pct = st.number_input("Target ± (% of mean)", min_value=0.1, value=2.0, step=0.5,
+                                         help="Relative half-width of the confidence interval to reach.")
+        with p_col3:
+            max_reps = st.number_input("Max Replications", min_value=10, value=1000, step=100)
+        with p_col4:
+            max_seconds = st.number_input("Time Budget (s)", min_value=1, value=120, step=10)
+        st.caption("Replications are added in stages sized from the current variance estimate until the target "
+                   "is met or the budget runs out; confidence level and variance reduction are taken from above.")
+
+        if st.button("🎯 Run to Target Precision"):
+            errors = validate_inputs(model_cfg, service_cfg) + validate_run_length(run_length)
+            rho = traffic_intensity(model_cfg, service_cfg) if not errors else None
+
+            if errors:
+                st.error("❌ Invalid Inputs:")
+                for e in errors:
+                    st.write(f"• {e}")
+            elif rho > 1:
+                st.error(f"❌ Simulation does not execute as ρ = {rho:.3f} > 1")
+            elif control_variates and not fixed_customer_count(run_length):
+                st.error(f"❌ {CONTROL_RUN_LENGTH_ERROR}")
+            else:
+                seq_bar = st.progress(0.0, text="Running initial replications...")
+                study = run_until_precision(
+                    model_cfg, service_cfg, metric=target_metric, target=target_pct / 100, confidence=confidence,
+                    max_replications=int(max_reps), max_seconds=float(max_seconds), run_length=run_length,
+                    seed=int(seed_input) if seed_input is not None else None,
+                    progress=lambda done, total: seq_bar.progress(done / total, text=f"{done} / {total} replications"),
+                    antithetic=antithetic, control_variates=control_variates
+                )
+                seq_bar.empty()
+
+                n_done, ci = len(study["replications"]), study["intervals"][target_metric]
+                status = (f"{n_done} replications in {study['seconds']:.1f} s · ±{study['relative']:.2%} "
+                          f"at {confidence:.0%} · seed {study['seed']}")
+                if study["met"]:
+                    st.success(f"✅ Target ±{target_pct:g}% met: {status}")
+                else:
+                    budget = "replication" if study["stopped"] == "replications" else "time"
+                    st.warning(f"⚠️ {budget.capitalize()} budget used up before the target: {status}")
+
+                rows = [{"Source": "Simulation", "Wq": study["intervals"]["Wq"]["mean"],
+                         "W": study["intervals"]["W"]["mean"], f"± Half-width ({target_metric})": ci["half_width"]}]
+                for name, ref in study["analytic"].items():
+                    if "error" in ref:
+                        note = ref["error"]
+                    else:
+                        note = f"{ref[target_metric] / ci['mean'] - 1:+.1%} vs simulated" if ci["mean"] else ""
+                    rows.append({"Source": f"Analytic {name}", "Wq": ref.get("Wq"), "W": ref.get("W"), "Note": note})
+                st.dataframe(pd.DataFrame(rows).style.format(precision=4, na_rep="–"), use_container_width=True)
+                st.caption("Analytic values are steady-state sanity checks at the exact input means and variances "
+                           "the simulator samples. Its inter-arrival times come from the Poisson table and its "
+                           "service times are rounded to whole units, so the G/G approximation is usually closer "
+                           "than the matching M/M or M/G model; short runs also include the warm-up.")
+
+                with st.expander("Stages"):
+                    st.dataframe(pd.DataFrame(study["history"]).rename(columns={
+                        "replications": "Replications", "mean": f"Mean {target_metric}", "half_width": "± Half-width",
+                        "relative": "Relative", "seconds": "Seconds"
+                    }).style.format({"Relative": "{:.2%}"}, precision=4), use_container_width=True)
+
+        # ---------- Configuration Comparison ----------
+        st.markdown("#### ⚖️ Compare Configurations")
+        k_col1, k_col2 = st.columns(2)
+        with k_col1:
+            alt_s = st.number_input("Alternative Servers (s')", min_value=1, value=int(s) + 1, step=1)
+        with k_col2:
+            crn = st.checkbox("Common random numbers", value=True,
+                              help="Both configurations replay the same arrival, service and priority draws.")
+
+        if st.button("⚖️ Compare"):
+            alt_cfg = ModelConfig(model_cfg.model, model_cfg.lmbd, int(alt_s), model_cfg.with_priority,
+                                  model_cfg.preemption, model_cfg.priority_classes)
+            errors = validate_inputs(model_cfg, service_cfg) + validate_run_length(run_length)
+            if errors:
+                st.error("❌ Invalid Inputs:")
+                for e in errors:
+                    st.write(f"• {e}")
+            elif max(traffic_intensity(model_cfg, service_cfg), traffic_intensity(alt_cfg, service_cfg)) > 1:
+                st.error("❌ Both configurations need ρ ≤ 1.")
+            elif antithetic and n_reps % 2:
+                st.error("❌ Antithetic replications come in pairs; use an even number of replications.")
+            elif control_variates and not fixed_customer_count(run_length):
+                st.error(f"❌ {CONTROL_RUN_LENGTH_ERROR}")
+            else:
+                cmp_bar = st.progress(0.0, text="Comparing...")
+                comparison = compare_replications(
+                    model_cfg, service_cfg, alt_cfg, service_cfg, int(n_reps), crn=crn, confidence=confidence,
+                    run_length=run_length, seed=int(seed_input) if seed_input is not None else None,
+                    progress=lambda done, total: cmp_bar.progress(done / total, text=f"{done} / {total} replications"),
+                    antithetic=antithetic, control_variates=control_variates
+                )
+                cmp_bar.empty()
+                st.dataframe(pd.DataFrame([
+                    {"Metric": name, f"s = {int(s)}": comparison["a"]["intervals"][name]["mean"],
+                     f"s' = {int(alt_s)}": comparison["b"]["intervals"][name]["mean"],
+                     "Difference (s' − s)": ci["mean"], "± Half-width": ci["half_width"],
+                     "Variance Reduction": comparison["variance_reduction"][name]}
+                    for name, ci in comparison["intervals"].items()
+                ]).style.format(precision=4), use_container_width=True)
+                st.caption("Variance reduction: variance of two independent runs over the variance of the paired "
+                           f"difference (about 1 without common random numbers) · seed {comparison['seed']}")
+
+        # ---------- Saved Traces ----------
+        st.markdown("---")
+        with st.expander("📂 Open a Saved Trace"):
+            load_dir = st.text_input("Trace Directory", key="trace_load_dir")
+            if st.button("Load Trace") and load_dir:
+                try:
+                    saved = open_trace(load_dir)
+                except (OSError, ValueError) as e:
+                    st.error(f"❌ Cannot open trace: {e}")
+                else:
+                    st.caption(f"{saved.fmt} trace · {saved.counts['customers']:,} customers · "
+                               f"{saved.counts['segments']:,} segments")
+                    st.dataframe(saved.dataframe(limit=1000), use_container_width=True)
+                    trace_timeline_section(saved, saved.meta.get("model", {}).get("s", 1))
 
         # ---------- Back ----------
         if st.button("🏠 Back to Start"):
@@ -884,6 +866,7 @@ elif st.session_state.page == "run":
 
 # 5. Queuing Calculator
 elif st.session_state.page == "calculator":
+    from queuing_calculator import queuing_calculator_ui
 
     st.markdown(
         "<h1 style='text-align:center;'>📊 Queuing Calculator</h1>",
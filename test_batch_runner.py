@@ -0,0 +1,50 @@
+import csv
+import json
+
+import batch_runner
+
+# Batch runs: one bad parameter file or failing run is reported in summary.csv, the rest still run.
+
+VALID = {"model": "MMS", "lmbd": 2.0, "s": 2, "runs": 2, "seed": 7,
+         "service": {"kind": "exponential", "mu": 3.0}, "run_length": {"customers": 200}}
+
+def write_params(tmp_path, name, data):
+    path = tmp_path / f"{name}.json"
+    path.write_text(data if isinstance(data, str) else json.dumps(data))
+    return str(path)
+
+def read_summary(out_dir):
+    with open(out_dir / "summary.csv", newline="") as f:
+        return list(csv.DictReader(f))
+
+def test_malformed_file_among_valid_ones(tmp_path):
+    paths = [write_params(tmp_path, "first", VALID),
+             write_params(tmp_path, "typo", dict(VALID, service={"kind": "exponential", "muu": 3.0})),
+             write_params(tmp_path, "broken", "{not json"),
+             write_params(tmp_path, "last", [VALID, dict(VALID, service={"kind": "exponential", "mu": -1.0})])]
+    out = tmp_path / "out"
+    assert batch_runner.main(paths + ["--out", str(out), "--summary-only"]) == 1
+    rows = read_summary(out)
+    assert [row["name"] for row in rows] == ["first", "first", "typo", "broken", "last_1", "last_1", "last_2"]
+    errors = {row["name"]: row["error"] for row in rows if row["error"]}
+    assert set(errors) == {"typo", "broken", "last_2"}
+    assert "muu" in errors["typo"] and "negative" in errors["last_2"]
+    assert all(row["Customers"] == "200" for row in rows if not row["error"])
+
+def test_failing_replication_is_recorded_and_the_batch_continues(tmp_path, monkeypatch):
+    simulate = batch_runner.generate_simulation
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        return simulate(*args, **kwargs)
+
+    monkeypatch.setattr(batch_runner, "generate_simulation", flaky)
+    out = tmp_path / "out"
+    path = write_params(tmp_path, "base", VALID)
+    assert batch_runner.main([path, "--out", str(out), "--summary-only", "--trace", "memmap", "--profile"]) == 1
+    rows = read_summary(out)
+    assert [(row["run"], row["error"]) for row in rows] == [("1", "RuntimeError: disk full"), ("2", "")]
+    assert not (out / "base_run1_trace").exists() and (out / "base_run2_trace" / "meta.json").exists()
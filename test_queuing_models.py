@@ -0,0 +1,79 @@
+import math
+import numpy as np
+import pytest
+
+from queuing_models import (
+    erlang_b, erlang_c, erlang_b_lookup, erlang_b_array, erlang_c_array, erlang_table_stats,
+    compute_mm1, compute_mms, compute_mg1, compute_mgs, compute_gg1, compute_ggs, compute_model_array
+)
+
+# Closed-form models: textbook values, and the lookup / array forms against the scalar ones.
+
+def erlang_b_direct(s, a):
+    return (a ** s / math.factorial(s)) / sum(a ** k / math.factorial(k) for k in range(s + 1))
+
+@pytest.mark.parametrize("s, a, expected", [(1, 1.0, 0.5), (2, 1.0, 0.2), (10, 5.0, 0.018384570336648)])
+def test_erlang_b_known_values(s, a, expected):
+    assert erlang_b(s, a) == pytest.approx(expected, rel=1e-9)
+
+@pytest.mark.parametrize("s, a", [(3, 2.5), (20, 15.0), (60, 55.5)])
+def test_erlang_b_matches_the_direct_formula(s, a):
+    assert erlang_b(s, a) == pytest.approx(erlang_b_direct(s, a), rel=1e-12)
+
+def test_erlang_b_stays_finite_for_large_systems():
+    b = erlang_b(5000, 4900.0)
+    assert 0 < b < 1 and erlang_c(5000, 4900.0) < 1
+
+def test_erlang_b_lookup_matches_the_recurrence():
+    a = 7.123456
+    before = erlang_table_stats()
+    for s in [5, 12, 3, 40, 40]:
+        assert erlang_b_lookup(s, a) == pytest.approx(erlang_b(s, a), rel=1e-14)
+    after = erlang_table_stats()
+    # 12 and 40 extend the table, 3 and the repeated 40 are lookups
+    assert after["misses"] - before["misses"] == 3 and after["hits"] - before["hits"] == 2
+
+def test_textbook_queues():
+    mm1 = compute_mm1(1.0, 2.0)
+    assert (mm1["Lq"], mm1["Wq"], mm1["W"], mm1["L"]) == pytest.approx((0.5, 0.5, 1.0, 1.0))
+    mm2 = compute_mms(1.0, 1.0, 2)
+    assert (mm2["Pw"], mm2["P0"], mm2["Lq"]) == pytest.approx((1 / 3, 1 / 3, 1 / 3))
+    # M/D/1 (no service variance) waits half as long as M/M/1
+    assert compute_mg1(1.0, 0.5, 0.0)["Wq"] == pytest.approx(mm1["Wq"] / 2)
+    assert "error" in compute_mms(3.0, 1.0, 3) and "error" in compute_mm1(2.0, 2.0)
+
+def test_multi_server_models_reduce_to_one_server():
+    mms = compute_mms(1.0, 2.0, 1)
+    assert mms["Wq"] == pytest.approx(compute_mm1(1.0, 2.0)["Wq"])
+    assert compute_mgs(1.0, 0.5, 0.25, 1)["Wq"] == pytest.approx(compute_mg1(1.0, 0.5, 0.25)["Wq"])
+    assert compute_ggs(1.0, 1.0, 1.0, 0.5, 0.25, 3)["Wq"] == pytest.approx(compute_mms(1.0, 2.0, 3)["Wq"])
+
+def test_erlang_arrays_match_scalars():
+    s = np.array([1, 2, 5, 10, 40])
+    a = np.array([0.5, 1.5, 4.0, 9.5, 30.0])
+    np.testing.assert_allclose(erlang_b_array(s, a), [erlang_b(int(k), x) for k, x in zip(s, a)], rtol=1e-12)
+    np.testing.assert_allclose(erlang_c_array(s, a), [erlang_c(int(k), x) for k, x in zip(s, a)], rtol=1e-12)
+    assert np.isnan(erlang_c_array(2, 3.0))
+
+SCALAR = {
+    "M/M/1": lambda l, m, s, ca2, cs2: compute_mm1(l, m),
+    "M/M/s": lambda l, m, s, ca2, cs2: compute_mms(l, m, s),
+    "M/G/1": lambda l, m, s, ca2, cs2: compute_mg1(l, 1 / m, cs2 / m ** 2),
+    "M/G/s": lambda l, m, s, ca2, cs2: compute_mgs(l, 1 / m, cs2 / m ** 2, s),
+    "G/G/1": lambda l, m, s, ca2, cs2: compute_gg1(l, 1 / l, ca2 / l ** 2, 1 / m, cs2 / m ** 2),
+    "G/G/s": lambda l, m, s, ca2, cs2: compute_ggs(l, 1 / l, ca2 / l ** 2, 1 / m, cs2 / m ** 2, s),
+}
+
+@pytest.mark.parametrize("model", SCALAR)
+def test_model_arrays_match_scalar_models(model):
+    lmbd, mu, s = np.meshgrid(np.linspace(0.5, 6.0, 12), [1.0, 2.5], [1, 3, 8], indexing="ij")
+    ca2, cs2 = 0.7, 1.6
+    res = compute_model_array(model, lmbd, mu, s, ca2, cs2)
+    for idx in np.ndindex(lmbd.shape):
+        expected = SCALAR[model](lmbd[idx], mu[idx], int(s[idx]), ca2, cs2)
+        if "error" in expected:
+            assert not res["stable"][idx] and np.isnan(res["Wq"][idx])
+            continue
+        assert res["stable"][idx]
+        for key, value in expected.items():
+            assert res[key][idx] == pytest.approx(value, rel=1e-9), (key, idx)
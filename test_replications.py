@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from simulation_engine import ModelConfig, RunLength, service_for_model, generate_simulation
+from replications import (
+    REPLICATION_METRICS, CONTROL_METRICS, run_replications, run_until_precision, compare_replications
+)
+
+# Replication studies are reproducible from their seed, serially or on a process pool.
+
+MODEL, SERVICE = ModelConfig("MMS", 2.0, 2, True, False, 3), service_for_model("MMS", mu=3.0)
+RUN_LENGTH = RunLength(customers=300)
+SEED = 11
+
+def study(replications, workers, **options):
+    return run_replications(MODEL, SERVICE, replications, workers=workers, seed=SEED, run_length=RUN_LENGTH,
+                            **options)
+
+def test_serial_and_parallel_runs_are_identical():
+    serial = study(8, workers=1)
+    assert serial["replications"] == study(8, workers=1)["replications"]
+    parallel = study(8, workers=3)
+    assert parallel["workers"] == 3
+    assert parallel["replications"] == serial["replications"]
+    assert parallel["intervals"] == serial["intervals"]
+
+def test_replication_r_runs_on_seed_child_r():
+    rows = study(3, workers=1)["replications"]
+    for r, row in enumerate(rows):
+        _, summary, _ = generate_simulation(MODEL, SERVICE, rng=np.random.SeedSequence(SEED, spawn_key=(r,)),
+                                            run_length=RUN_LENGTH)
+        assert row == pytest.approx({**{name: summary[key] for name, key in REPLICATION_METRICS.items()},
+                                     **{key: summary[key] for key in CONTROL_METRICS}})
+    assert len({row["Wq"] for row in rows}) == 3
+
+def test_antithetic_pairs_are_reproducible():
+    serial = study(6, workers=1, antithetic=True)
+    parallel = study(6, workers=2, antithetic=True)
+    assert parallel["replications"] == serial["replications"]
+    assert serial["intervals"]["Wq"]["n"] == 3
+
+def test_sequential_study_extends_the_fixed_one():
+    sequential = run_until_precision(MODEL, SERVICE, metric="Wq", target=1e-9, initial=4, max_replications=10,
+                                     workers=2, seed=SEED, run_length=RUN_LENGTH)
+    assert sequential["stopped"] == "replications" and not sequential["met"]
+    assert sequential["replications"] == study(10, workers=1)["replications"]
+
+def test_common_random_numbers_replay_the_same_inputs():
+    comparison = compare_replications(MODEL, SERVICE, MODEL, SERVICE, 4, seed=SEED, workers=1,
+                                      run_length=RUN_LENGTH)
+    assert comparison["a"]["replications"] == comparison["b"]["replications"]
+    assert all(ci["mean"] == 0 for ci in comparison["intervals"].values())
+
+def test_control_variates_need_a_fixed_customer_count():
+    with pytest.raises(ValueError):
+        run_replications(MODEL, SERVICE, 4, workers=1, seed=SEED, run_length=RunLength(horizon=200.0),
+                         control_variates=True)
+    with pytest.raises(ValueError):
+        run_until_precision(MODEL, SERVICE, seed=SEED, run_length=RunLength(completions=100), control_variates=True)
+    assert study(6, workers=1, control_variates=True)["intervals"]["Wq"]["beta"]
@@ -0,0 +1,60 @@
+import math
+import numpy as np
+import pytest
+
+from sim_stats import (
+    student_t_ppf, student_t_cdf, confidence_interval, RunningStats, mser, batch_means, lag1_autocorrelation
+)
+
+# Output-analysis helpers against published values and direct computations.
+
+@pytest.mark.parametrize("q, df, expected", [
+    (0.975, 1, 12.7062047), (0.975, 10, 2.2281389), (0.95, 30, 1.6972609), (0.995, 4, 4.6040949),
+    (0.025, 5, -2.5705818),
+])
+def test_student_t_ppf_matches_tables(q, df, expected):
+    assert student_t_ppf(q, df) == pytest.approx(expected, abs=1e-6)
+    assert student_t_cdf(student_t_ppf(q, df), df) == pytest.approx(q, abs=1e-12)
+
+def test_student_t_ppf_rejects_probabilities_outside_the_open_interval():
+    with pytest.raises(ValueError):
+        student_t_ppf(1.0, 5)
+
+def test_confidence_interval():
+    values = [2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0]
+    ci = confidence_interval(values, 0.95)
+    std = np.std(values, ddof=1)
+    assert ci["mean"] == 5.0 and ci["n"] == 8 and ci["std"] == pytest.approx(std)
+    assert ci["half_width"] == pytest.approx(student_t_ppf(0.975, 7) * std / math.sqrt(8))
+    assert ci["low"] == pytest.approx(5.0 - ci["half_width"]) and ci["high"] == pytest.approx(5.0 + ci["half_width"])
+    assert math.isnan(confidence_interval([3.0])["half_width"])
+
+def test_running_stats_matches_numpy():
+    values = np.random.default_rng(3).normal(1e6, 2.0, 10_000)
+    stats = RunningStats()
+    for v in values:
+        stats.add(v)
+    assert stats.n == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.var == pytest.approx(values.var(ddof=1), rel=1e-9)
+
+def test_mser_truncates_the_initial_transient():
+    rng = np.random.default_rng(5)
+    values = np.r_[np.linspace(50, 10, 200), 10 + rng.normal(0, 1, 2000)]
+    result = mser(values)
+    assert 150 <= result["truncate"] <= 300 and not result["at_limit"]
+
+def test_mser_flags_a_run_without_steady_state():
+    assert mser(np.arange(1000.0))["at_limit"]
+
+def test_batch_means_drops_the_remainder_from_the_start():
+    values = list(range(5)) + list(range(1, 101))
+    ci = batch_means(values, batches=10)
+    assert ci["batch_size"] == 10 and ci["n"] == 10
+    assert ci["mean"] == pytest.approx(50.5)
+    assert ci["std"] == pytest.approx(np.std(np.arange(5.5, 100, 10), ddof=1))
+
+def test_lag1_autocorrelation():
+    assert lag1_autocorrelation([1, -1] * 50) == pytest.approx(-0.99)
+    assert lag1_autocorrelation([2.0] * 10) == 0.0
+    assert math.isnan(lag1_autocorrelation([1.0, 2.0]))
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from simulation_engine import (
+    ModelConfig, RunLength, service_for_model, generate_simulation, queue_series, get_time_series_data,
+    server_utilization, PREEMPTED
+)
+
+# Regression guard for the engine: seeded runs against fixed reference values, plus invariants of
+# the schedule, the segment log and the derived series. Run with `python -m pytest -q`.
+
+CASES = {
+    "mm1": (ModelConfig("MM1", 2.0, 1, False, False), service_for_model("MM1", mu=1.5)),
+    "mms_priority": (ModelConfig("MMS", 2.0, 2, True, False, 3), service_for_model("MMS", mu=3.0)),
+    "mms_preemptive": (ModelConfig("MMS", 2.0, 2, True, True, 3), service_for_model("MMS", mu=3.0)),
+    "mg1_normal": (ModelConfig("MG1", 2.0, 1, False, False), service_for_model("MG1", "normal", mu=1.5, sigma=0.5)),
+    "mgs_uniform": (ModelConfig("MGS", 2.0, 3, True, True, 2), service_for_model("MGS", "uniform", a=2, b=6)),
+}
+SEED = 2024
+RUN_LENGTH = RunLength(customers=2000)
+
+# Summary of each case at SEED / RUN_LENGTH; a change here changes what the simulator samples or schedules
+REFERENCE = {
+    "mm1": {"Avg Waiting": 6.3125, "Avg Turnaround": 8.0505, "Utilization": 0.8718334587409079, "Makespan": 3987},
+    "mms_priority": {"Avg Waiting": 3.264, "Avg Turnaround": 6.395, "Utilization": 0.7847117794486216,
+                     "Makespan": 3990},
+    "mms_preemptive": {"Avg Waiting": 3.2535, "Avg Turnaround": 6.3845, "Utilization": 0.7847117794486216,
+                       "Makespan": 3990},
+    "mg1_normal": {"Avg Waiting": 1.4845, "Avg Turnaround": 3.014, "Utilization": 0.7676286072772899,
+                   "Makespan": 3985},
+    "mgs_uniform": {"Avg Waiting": 0.6015, "Avg Turnaround": 4.611, "Utilization": 0.6700927550764603,
+                    "Makespan": 3989},
+}
+
+def run(case, **kwargs):
+    model, service = CASES[case]
+    return generate_simulation(model, service, rng=SEED, run_length=kwargs.pop("run_length", RUN_LENGTH), **kwargs)
+
+# ---------- REFERENCE VALUES ----------
+@pytest.mark.parametrize("case", CASES)
+def test_seeded_summary_matches_reference(case):
+    df, summary, _ = run(case)
+    assert summary["Customers"] == len(df) == RUN_LENGTH.customers
+    for key, expected in REFERENCE[case].items():
+        assert summary[key] == pytest.approx(expected, rel=1e-9), key
+
+@pytest.mark.parametrize("case", CASES)
+def test_streaming_summary_matches_full_run(case):
+    _, full, _ = run(case)
+    df, streamed, _ = run(case, keep_rows=20)
+    assert len(df) == 20
+    for key, value in full.items():
+        if key != "Servers":
+            assert streamed[key] == pytest.approx(value, rel=1e-9, abs=1e-12), key
+
+# ---------- RUN LENGTH ----------
+def test_run_length_rules():
+    df, summary, _ = run("mms_preemptive", run_length=RunLength(horizon=500.0))
+    assert df["Arrival Time"].max() <= 500.0 and summary["Customers"] == len(df)
+    df, summary, _ = run("mms_preemptive", run_length=RunLength(completions=300))
+    assert summary["Customers"] == len(df) == 300
+
+# ---------- SCHEDULE INVARIANTS ----------
+def event_times(df, gantt):
+    return np.unique(np.concatenate((df["Arrival Time"], gantt["start"], gantt["end"])))
+
+@pytest.mark.parametrize("case", CASES)
+def test_segments_cover_each_service(case):
+    model, _ = CASES[case]
+    df, _, gantt = run(case)
+    cust = gantt["cust"] - 1
+    served = np.bincount(cust, weights=gantt["end"] - gantt["start"], minlength=len(df))
+    np.testing.assert_allclose(served, df["Service Time"])
+    first = np.full(len(df), np.inf)
+    np.minimum.at(first, cust, gantt["start"])
+    last = np.zeros(len(df))
+    np.maximum.at(last, cust, gantt["end"])
+    np.testing.assert_array_equal(first, df["Start Time"])
+    np.testing.assert_array_equal(last, df["End Time"])
+    if not model.preemption:
+        assert not (gantt["kind"] == PREEMPTED).any()
+
+@pytest.mark.parametrize("case", CASES)
+def test_servers_never_double_booked(case):
+    model, _ = CASES[case]
+    _, _, gantt = run(case)
+    order = np.lexsort((gantt["start"], gantt["server"]))
+    server, start, end = gantt["server"][order], gantt["start"][order], gantt["end"][order]
+    same = server[1:] == server[:-1]
+    assert (start[1:][same] >= end[:-1][same]).all()
+    assert ((server >= 1) & (server <= model.s)).all()
+
+@pytest.mark.parametrize("case", ["mms_priority", "mms_preemptive", "mgs_uniform"])
+def test_running_jobs_follow_priority(case):
+    # Between consecutive events: never more than s jobs in service, no idle server while a job waits,
+    # and with preemption every job in service ranks ahead of every waiting one by (priority, arrival)
+    model, _ = CASES[case]
+    df, _, gantt = run(case)
+    arrival, end = df["Arrival Time"].to_numpy(), df["End Time"].to_numpy()
+    rank = np.stack([df["Priority"].to_numpy(), arrival], axis=1)
+    for t in event_times(df, gantt):
+        running = np.unique(gantt["cust"][(gantt["start"] <= t) & (gantt["end"] > t)] - 1)
+        present = np.flatnonzero((arrival <= t) & (end > t))
+        waiting = np.setdiff1d(present, running)
+        assert len(running) == min(model.s, len(present)), t
+        if model.preemption and len(running) and len(waiting):
+            worst_running = max(map(tuple, rank[running]))
+            best_waiting = min(map(tuple, rank[waiting]))
+            assert worst_running <= best_waiting, t
+
+# ---------- DERIVED SERIES ----------
+def test_time_series_match_direct_counts():
+    model, _ = CASES["mms_preemptive"]
+    df, summary, gantt = run("mms_preemptive", run_length=RunLength(customers=400))
+    times, q_t, status = get_time_series_data(df, summary["Makespan"], model.s, gantt)
+    arrival, end = df["Arrival Time"].to_numpy(), df["End Time"].to_numpy()
+    for k, t in enumerate(times):
+        in_service = ((gantt["start"] <= t) & (gantt["end"] > t)).sum()
+        assert q_t[k] == ((arrival <= t) & (end > t)).sum() - in_service, t
+        for j in range(1, model.s + 1):
+            on = gantt["server"] == j
+            busy = ((gantt["start"][on] <= t) & (gantt["end"][on] > t)).any()
+            assert status[j][k] == int(busy), (t, j)
+
+@pytest.mark.parametrize("case", ["mms_priority", "mms_preemptive", "mgs_uniform"])
+def test_queue_length_metric_matches_queue_series(case):
+    # Lq is the time average of the charted Q(t), preempted jobs waiting to resume included
+    df, summary, gantt = run(case)
+    times, q_t = queue_series(df, gantt, summary["Makespan"])
+    assert np.dot(q_t[:-1], np.diff(times)) / summary["Makespan"] == pytest.approx(summary["Avg Queue Length"])
+
+def test_server_utilization_matches_segments():
+    model, _ = CASES["mgs_uniform"]
+    _, summary, gantt = run("mgs_uniform")
+    table = server_utilization(gantt, model.s, summary["Makespan"])
+    for j in range(1, model.s + 1):
+        on = gantt["server"] == j
+        assert table[j]["Busy Time"] == pytest.approx((gantt["end"][on] - gantt["start"][on]).sum())
+        assert table[j]["Busy Time"] + table[j]["Idle Time"] == pytest.approx(summary["Makespan"])
+    assert summary["Utilization"] == pytest.approx(
+        sum(table[j]["Busy Time"] for j in table) / (model.s * summary["Makespan"]))
@@ -0,0 +1,59 @@
+import pytest
+
+from queuing_models import compute_mms, compute_mgs, compute_ggs
+from staffing_optimizer import min_servers, min_service_rate, optimal_servers_cost
+
+# Sizing searches against a brute-force scan of the calculator's own models.
+
+CA2, CS2 = 0.6, 1.8
+
+def evaluate(model, lmbd, mu, s):
+    if model == "M/M/s": return compute_mms(lmbd, mu, s)
+    if model == "M/G/s": return compute_mgs(lmbd, 1 / mu, CS2 / mu ** 2, s)
+    return compute_ggs(lmbd, 1 / lmbd, CA2 / lmbd ** 2, 1 / mu, CS2 / mu ** 2, s)
+
+def stable_staffing(model, lmbd, mu):
+    s = 1
+    while "error" in evaluate(model, lmbd, mu, s):
+        s += 1
+    return s
+
+MODELS = ["M/M/s", "M/G/s", "G/G/s"]
+
+@pytest.mark.parametrize("model", MODELS)
+@pytest.mark.parametrize("target, limit", [("Wq", 0.05), ("Pw", 0.2), ("ρ", 0.7)])
+def test_min_servers_matches_brute_force(model, target, limit):
+    lmbd, mu = 42.0, 1.7
+    s = stable_staffing(model, lmbd, mu)
+    while evaluate(model, lmbd, mu, s)[target] > limit:
+        s += 1
+    res = min_servers(model, lmbd, mu, target, limit, CA2, CS2)
+    assert res["s"] == s
+    expected = evaluate(model, lmbd, mu, s)
+    for key in ["Wq", "Pw", "Lq", "P0"]:
+        assert res[key] == pytest.approx(expected[key], rel=1e-9), key
+
+@pytest.mark.parametrize("model", MODELS)
+@pytest.mark.parametrize("target, limit", [("Wq", 0.1), ("Pw", 0.3), ("ρ", 0.8)])
+def test_min_service_rate_is_the_threshold(model, target, limit):
+    lmbd, s = 9.0, 4
+    res = min_service_rate(model, lmbd, s, target, limit, CA2, CS2)
+    assert evaluate(model, lmbd, res["μ"], s)[target] <= limit * (1 + 1e-9)
+    slower = evaluate(model, lmbd, res["μ"] * (1 - 1e-6), s)
+    assert "error" in slower or slower[target] > limit
+
+@pytest.mark.parametrize("model", MODELS)
+def test_optimal_servers_cost_matches_brute_force(model):
+    lmbd, mu, server_cost, wait_cost = 30.0, 2.0, 10.0, 45.0
+    first = stable_staffing(model, lmbd, mu)
+    costs = {s: server_cost * s + wait_cost * evaluate(model, lmbd, mu, s)["Lq"] for s in range(first, first + 60)}
+    res = optimal_servers_cost(model, lmbd, mu, server_cost, wait_cost, CA2, CS2)
+    assert res["s"] == min(costs, key=costs.get)
+    assert res["Total Cost"] == pytest.approx(costs[res["s"]], rel=1e-9)
+
+def test_invalid_inputs_are_reported():
+    assert "error" in min_servers("M/M/1", 1.0, 2.0, "Wq", 0.1)
+    assert "error" in min_servers("M/M/s", 1.0, 2.0, "L", 0.1)
+    assert "error" in min_service_rate("M/M/s", 1.0, 2, "Pw", 1.0)
+    assert "error" in optimal_servers_cost("M/M/s", 1.0, 2.0, -1.0, 1.0)
+    assert "error" in min_servers("M/M/s", 1000.0, 1.0, "Wq", 0.01, s_max=100)
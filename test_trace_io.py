@@ -0,0 +1,83 @@
+import importlib.util, tracemalloc
+import numpy as np
+import pytest
+
+from simulation_engine import (
+    ModelConfig, RunLength, service_for_model, generate_simulation, queue_series, SEGMENT_DTYPE, TRACE_CHUNK
+)
+from trace_io import TRACE_DTYPES, TraceWriter, open_trace
+
+# Trace files on disk: what is written is what is read back, in bounded memory.
+
+def synthetic_trace(path, fmt, customers, seed=1):
+    # Customers in shuffled ID order (traces are stored in completion order)
+    rng = np.random.default_rng(seed)
+    writer = TraceWriter(str(path), fmt)
+    for lo in range(0, customers, TRACE_CHUNK):
+        ids = rng.permutation(np.arange(lo + 1, min(lo + TRACE_CHUNK, customers) + 1))
+        records = np.zeros(len(ids), dtype=TRACE_DTYPES["customers"])
+        records["id"], records["arrival"], records["service"] = ids, ids, 1
+        records["start"], records["end"] = ids + 1, ids + 2
+        writer.write("customers", records)
+    writer.close()
+    return open_trace(str(path))
+
+@pytest.mark.parametrize("fmt", ["csv", "memmap"])
+def test_dataframe_preview_memory_is_bounded_by_limit(tmp_path, fmt):
+    customers = 10 * TRACE_CHUNK
+    trace = synthetic_trace(tmp_path / "trace", fmt, customers)
+    tracemalloc.start()
+    try:
+        preview = trace.dataframe(limit=1000)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert preview["     ID"].tolist() == list(range(1, 1001))
+    assert (preview["Waiting Time"] == 1).all() and (preview["Turnaround Time"] == 2).all()
+    # Reading every record would take customers * itemsize bytes before any table is built
+    assert peak < 0.4 * customers * TRACE_DTYPES["customers"].itemsize
+
+FORMATS = ["csv", "memmap", pytest.param("parquet", marks=pytest.mark.skipif(
+    importlib.util.find_spec("pyarrow") is None, reason="pyarrow not installed"))]
+
+def traced_run(path, fmt):
+    model, service = ModelConfig("MMS", 2.0, 2, True, True, 3), service_for_model("MMS", mu=3.0)
+    writer = TraceWriter(str(path), fmt, meta={"seed": 7})
+    df, summary, gantt = generate_simulation(model, service, rng=7, run_length=RunLength(customers=1500),
+                                             trace=writer)
+    writer.close(summary)
+    return df, summary, gantt, open_trace(str(path))
+
+def by_key(records, *keys):
+    return records[np.lexsort(tuple(records[k] for k in reversed(keys)))]
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_trace_round_trip(tmp_path, fmt):
+    df, summary, gantt, trace = traced_run(tmp_path / "trace", fmt)
+    assert trace.counts == {"customers": len(df), "segments": len(gantt)}
+    assert trace.meta["seed"] == 7 and trace.meta["summary"]["Customers"] == summary["Customers"]
+    table = trace.dataframe()
+    for column in table.columns:
+        np.testing.assert_array_equal(table[column].to_numpy(), df[column].to_numpy(), err_msg=column)
+    segments = trace.records("segments")
+    for name in SEGMENT_DTYPE.names:
+        np.testing.assert_array_equal(by_key(segments, "cust", "start")[name], by_key(gantt, "cust", "start")[name])
+    assert trace.segment_end(-1) == segments["end"][-1] == gantt["end"].max()
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_trace_chunks_and_window(tmp_path, fmt):
+    df, summary, gantt, trace = traced_run(tmp_path / "trace", fmt)
+    for kind in TRACE_DTYPES:
+        chunks = list(trace.chunks(kind, rows=400))
+        assert max(len(c) for c in chunks) == 400
+        np.testing.assert_array_equal(np.concatenate(chunks), trace.records(kind))
+    times, q_t, segments = trace.window()
+    np.testing.assert_array_equal((times, q_t), queue_series(df, gantt, summary["Makespan"]))
+    assert len(segments) == len(gantt)
+    # A narrow window keeps the customers already waiting at t0, so Q(t) agrees inside it
+    t0, t1 = 0.4 * summary["Makespan"], 0.6 * summary["Makespan"]
+    times_w, q_w, _ = trace.window(t0, t1)
+    inside = (times >= t0) & (times <= t1)
+    np.testing.assert_array_equal(q_w[np.searchsorted(times_w, times[inside], side="right") - 1], q_t[inside])
+    with pytest.raises(ValueError):
+        trace.window(limit=10)
@@ -0,0 +1,211 @@
+import json, os
+import numpy as np
+import pandas as pd
+
+from simulation_engine import CUSTOMER_DTYPE, SEGMENT_DTYPE, TRACE_CHUNK, event_queue_series
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:     # Parquet export is optional
+    pa = pq = None
+
+# Simulation traces on local disk: generate_simulation(..., trace=TraceWriter(path)) streams every
+# completed customer and every service segment to `path/` in chunks, and open_trace(path) reads them
+# back lazily (column by column, chunk by chunk, or as a time window for the charts).
+#
+#   path/meta.json                      format, dtypes, record counts, run config and summary
+#   path/customers.{csv,parquet,bin}    completion order (CUSTOMER_DTYPE fields)
+#   path/segments.{csv,parquet,bin}     close order (SEGMENT_DTYPE fields)
+#
+# "memmap" stores raw little-endian records that the reader maps with np.memmap, so nothing is
+# read into memory until it is touched.
+
+TRACE_FORMATS = {"csv": "csv", "parquet": "parquet", "memmap": "bin"}
+TRACE_DTYPES = {"customers": CUSTOMER_DTYPE, "segments": SEGMENT_DTYPE}
+WINDOW_SEGMENTS = 100_000           # default chart window: about this many service segments
+MAX_WINDOW_SEGMENTS = 1_000_000     # records a chart window may read into memory
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("Parquet traces need pyarrow (pip install pyarrow); use the csv or memmap format instead.")
+
+# ---------- WRITER ----------
+class TraceWriter:
+    def __init__(self, path, fmt="memmap", meta=None):
+        if fmt not in TRACE_FORMATS: raise ValueError(f"Unknown trace format: {fmt}")
+        if fmt == "parquet": _require_pyarrow()
+        os.makedirs(path, exist_ok=True)
+        self.path, self.fmt, self.meta = path, fmt, dict(meta or {})
+        self.counts = {kind: 0 for kind in TRACE_DTYPES}
+        self._files = {}
+        self.closed = False
+
+    def _file(self, kind):
+        return os.path.join(self.path, f"{kind}.{TRACE_FORMATS[self.fmt]}")
+
+    def write(self, kind, records):
+        if not len(records) and self.counts[kind]: return
+        dtype = TRACE_DTYPES[kind].newbyteorder("<")
+        if self.fmt == "memmap":
+            f = self._files.get(kind) or self._files.setdefault(kind, open(self._file(kind), "wb"))
+            f.write(records.astype(dtype, copy=False).tobytes())
+        elif self.fmt == "csv":
+            f = self._files.get(kind) or self._files.setdefault(kind, open(self._file(kind), "w", newline=""))
+            pd.DataFrame(records).to_csv(f, header=f.tell() == 0, index=False)
+        else:
+            table = pa.Table.from_pandas(pd.DataFrame(records), preserve_index=False)
+            if kind not in self._files:
+                self._files[kind] = pq.ParquetWriter(self._file(kind), table.schema)
+            self._files[kind].write_table(table)
+        self.counts[kind] += len(records)
+
+    def close(self, summary=None):
+        for kind in TRACE_DTYPES:
+            if kind not in self._files:  # empty trace still gets its (empty) files
+                self.write(kind, np.empty(0, dtype=TRACE_DTYPES[kind]))
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        meta = dict(self.meta, format=self.fmt, counts=self.counts,
+                    dtypes={kind: dtype.descr for kind, dtype in TRACE_DTYPES.items()})
+        if summary is not None:
+            meta["summary"] = {k: v for k, v in summary.items() if k != "Servers"}
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2, default=str)
+        self.closed = True
+
+    def abort(self):
+        # Drops a partial trace: its files and, if nothing else is in it, the directory
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        for name in [self._file(kind) for kind in TRACE_DTYPES] + [os.path.join(self.path, "meta.json")]:
+            if os.path.exists(name):
+                os.remove(name)
+        if not os.listdir(self.path):
+            os.rmdir(self.path)
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if self.closed: return
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+# ---------- READER ----------
+class Trace:
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.path, self.fmt = path, self.meta["format"]
+        self.counts = self.meta["counts"]
+
+    def _file(self, kind):
+        return os.path.join(self.path, f"{kind}.{TRACE_FORMATS[self.fmt]}")
+
+    def records(self, kind, columns=None):
+        # Whole columns: memory-mapped (memmap), column-projected (parquet) or parsed (csv)
+        dtype = TRACE_DTYPES[kind].newbyteorder("<")
+        if self.fmt == "memmap":
+            if not self.counts[kind]: return np.empty(0, dtype=dtype)
+            data = np.memmap(self._file(kind), dtype=dtype, mode="r", shape=(self.counts[kind],))
+            return data if columns is None else data[list(columns)]
+        columns = list(columns or dtype.names)
+        if self.fmt == "parquet":
+            _require_pyarrow()
+            frame = pq.read_table(self._file(kind), columns=columns).to_pandas()
+        else:
+            frame = pd.read_csv(self._file(kind), usecols=columns)
+        return self._structured(frame, dtype[columns])
+
+    def chunks(self, kind, rows=TRACE_CHUNK, columns=None):
+        # Bounded-memory iteration over a trace of any size
+        dtype = TRACE_DTYPES[kind].newbyteorder("<")
+        names = list(columns or dtype.names)
+        if self.fmt == "memmap":
+            data = self.records(kind)
+            for i in range(0, len(data), rows):
+                yield np.array(data[i:i + rows][names])
+        elif self.fmt == "parquet":
+            _require_pyarrow()
+            for batch in pq.ParquetFile(self._file(kind)).iter_batches(batch_size=rows, columns=names):
+                yield self._structured(batch.to_pandas(), dtype[names])
+        else:
+            for frame in pd.read_csv(self._file(kind), usecols=names, chunksize=rows):
+                yield self._structured(frame, dtype[names])
+
+    @staticmethod
+    def _structured(frame, dtype):
+        out = np.empty(len(frame), dtype=dtype)
+        for name in dtype.names:
+            out[name] = frame[name].to_numpy()
+        return out
+
+    def segment_end(self, index):
+        # End time of segment `index` in close order (-1: the last). Segments are closed in time
+        # order, so this is the time by which index + 1 of them have ended.
+        count = self.counts["segments"]
+        if not count: return 0.0
+        index = index % count if index < 0 else min(index, count - 1)
+        if self.fmt == "memmap":
+            return float(self.records("segments", columns=["end"])["end"][index])
+        offset = 0
+        for chunk in self.chunks("segments", columns=["end"]):
+            if index < offset + len(chunk):
+                return float(chunk["end"][index - offset])
+            offset += len(chunk)
+
+    def window(self, t0=0.0, t1=np.inf, limit=None):
+        # Q(t) step series and Gantt segments restricted to [t0, t1], scanned chunk by chunk.
+        # Customers still waiting at t0 are kept, so Q(t) inside the window is exact. With `limit`,
+        # a window holding more customers or segments than that raises ValueError as soon as the
+        # scan passes it, so memory stays bounded however wide the window is.
+        arrivals, ends, segments = [], [], []
+        kept = 0
+        for chunk in self.chunks("customers", columns=["arrival", "end"]):
+            keep = (chunk["arrival"] <= t1) & (chunk["end"] >= t0)
+            arrivals.append(chunk["arrival"][keep]); ends.append(chunk["end"][keep])
+            kept += len(arrivals[-1])
+            if limit is not None and kept > limit:
+                raise ValueError(f"The window holds more than {limit:,} customers; narrow it.")
+        kept = 0
+        for chunk in self.chunks("segments"):
+            segments.append(chunk[(chunk["start"] <= t1) & (chunk["end"] > t0)])
+            kept += len(segments[-1])
+            if limit is not None and kept > limit:
+                raise ValueError(f"The window holds more than {limit:,} service segments; narrow it.")
+        arrivals, ends = (np.concatenate(x) if x else np.empty(0) for x in (arrivals, ends))
+        segments = np.concatenate(segments).astype(SEGMENT_DTYPE) if segments else np.empty(0, dtype=SEGMENT_DTYPE)
+        horizon = min(t1, ends.max()) if len(ends) else 0.0
+        times, q_t = event_queue_series(arrivals, ends, segments["start"], segments["end"], horizon)
+        return times, q_t, segments
+
+    def dataframe(self, limit=None):
+        # Customer table in the engine's display layout (first `limit` customers by ID). Customers
+        # are stored in completion order, so the scan keeps a running buffer of the `limit` smallest
+        # IDs: memory O(limit + chunk), whatever the trace's size.
+        if limit is None:
+            data = np.array(self.records("customers"))
+        else:
+            data = np.empty(0, dtype=TRACE_DTYPES["customers"].newbyteorder("<"))
+            for chunk in self.chunks("customers"):
+                data = np.concatenate((data, chunk))
+                if len(data) > limit:
+                    data = data[np.argpartition(data["id"], limit)[:limit]]
+        data = data[np.argsort(data["id"], kind="stable")]
+        tat = data["end"] - data["arrival"]
+        return pd.DataFrame({
+            "     ID": data["id"], "Inter Arrival": data["inter_arrival"], "Arrival Time": data["arrival"],
+            "Service Time": data["service"], "Priority": data["priority"],
+            "Start Time": data["start"], "End Time": data["end"],
+            "Waiting Time": np.maximum(0, tat - data["service"]), "Turnaround Time": tat,
+            "Response Time": data["start"] - data["arrival"], "Server": data["server"],
+        })
+
+def open_trace(path):
+    return Trace(path)